@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 
 class MainConfig(AppConfig):
-    name = 'cachalizer'
+    name = 'cachelizer'
+
+    def ready(self):
+        from cachelizer import generations, recompute
+        generations.connect_signals()
+        recompute.connect_signals()
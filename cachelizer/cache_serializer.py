@@ -1,14 +1,21 @@
+import copy
 import datetime
+import hashlib
 from abc import abstractmethod
 from collections import OrderedDict
 from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Optional, Type, Union, Callable, Dict, List
 
 from django.core.cache import caches, cache as default_cache
 from django.core.cache.backends.base import BaseCache
-from django.db.models import Model
+from django.core.exceptions import ObjectDoesNotExist, FieldDoesNotExist
+from django.db.models import Model, Manager, QuerySet, Field as ModelField, prefetch_related_objects
 from django.conf import settings
-from rest_framework.serializers import ModelSerializer, Serializer, BaseSerializer, SerializerMetaclass, ListSerializer, LIST_SERIALIZER_KWARGS
+from rest_framework import fields as drf_fields
+from rest_framework.fields import Field, SkipField
+from rest_framework.serializers import ModelSerializer, Serializer, BaseSerializer, SerializerMetaclass, ListSerializer, \
+    LIST_SERIALIZER_KWARGS, ALL_FIELDS
 
 
 def _first_true(iterable, default=False, pred=None):
@@ -25,6 +32,159 @@ def _first_true(iterable, default=False, pred=None):
     return next(filter(pred, iterable), default)
 
 
+def _clone_field(field: Field, declared: bool) -> Field:
+    # declared fields are deep copied like DRF does. the generated ones are built from fresh kwargs by
+    # `ModelSerializer.build_field`, so re-instantiating them is enough (and much cheaper), unless they wrap
+    # another field (e.g. `ManyRelatedField.child_relation`) that would end up bound to two parents
+    if declared or any(isinstance(value, Field) for value in field._kwargs.values()):
+        return copy.deepcopy(field)
+    return field.__class__(*field._args, **field._kwargs)
+
+
+# the stock `to_representation` of the fields `ModelSerializer` builds for plain model fields, mapped to what the
+# fast renderer calls instead: a cheaper equivalent, None to call the field's own method or `_RAW` for nothing
+_RAW = object()
+_FAST_RENDER_CONVERTERS = {
+    drf_fields.IntegerField.to_representation: int,
+    drf_fields.CharField.to_representation: str,
+    drf_fields.ReadOnlyField.to_representation: _RAW,
+    drf_fields.BooleanField.to_representation: None,
+    drf_fields.FloatField.to_representation: None,
+    drf_fields.DecimalField.to_representation: None,
+    drf_fields.DateTimeField.to_representation: None,
+    drf_fields.DateField.to_representation: None,
+    drf_fields.TimeField.to_representation: None,
+    drf_fields.DurationField.to_representation: None,
+    drf_fields.UUIDField.to_representation: None,
+    drf_fields.ChoiceField.to_representation: None,
+}
+
+# renderer factories generated by `_get_renderer_factory`, keyed by the rendered fields and the access mode
+_renderer_factories: Dict[tuple, Callable] = {}
+
+
+def _get_renderer_factory(fields: tuple, from_values: bool) -> Callable:
+    """
+    generates the source of a renderer unrolled for the given (field name, attname, raw) fields, reading
+    the values from model instances or from `.values()` rows. it is compiled once per shape, the returned
+    factory binds the converters of a concrete serializer.
+    """
+    factory = _renderer_factories.get((fields, from_values))
+    if factory is None:
+        lines = [f"def make({', '.join(f'c{i}' for i in range(len(fields)))}):",
+                 "    def render(source):",
+                 "        ret = OrderedDict()"]
+        for i, (name, attname, raw) in enumerate(fields):
+            lines.append(f"        value = source[{attname!r}]" if from_values else f"        value = source.{attname}")
+            lines.append(f"        ret[{name!r}] = value" if raw else f"        ret[{name!r}] = None if value is None else c{i}(value)")
+        lines += ["        return ret", "    return render"]
+        namespace = {"OrderedDict": OrderedDict}
+        exec("\n".join(lines), namespace)
+        factory = _renderer_factories[(fields, from_values)] = namespace["make"]
+    return factory
+
+
+def _describe(value):
+    """
+    a description of a field option / Meta value that is stable across processes (no object ids)
+    """
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_describe(item) for item in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return sorted((str(key), _describe(item)) for key, item in value.items())
+    if isinstance(value, Field):
+        return _describe_field(value)
+    if isinstance(value, type) and issubclass(value, Model):
+        return value._meta.label_lower
+    if isinstance(value, type) or callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', type(value).__qualname__)}"
+    if isinstance(value, (str, int, float, bool, type(None), datetime.date, datetime.timedelta)):
+        return value
+    return f"{type(value).__module__}.{type(value).__qualname__}"
+
+
+def _describe_field(field: Field) -> list:
+    field_class = type(field)
+    description = [f"{field_class.__module__}.{field_class.__qualname__}", _describe(field._args),
+                   _describe(field._kwargs)]
+    # nested serializers contribute their structure, a `ListSerializer`'s child is part of its kwargs
+    if isinstance(field, _CashedSerializerBase):
+        description.append(field._get_schema_fingerprint())
+    elif isinstance(field, BaseSerializer) and hasattr(field_class, "_declared_fields"):
+        description.append(_describe_serializer_class(field_class))
+    return description
+
+
+def _describe_serializer_class(serializer_class: Type[BaseSerializer]) -> list:
+    # the `cache_*` options of `Meta` don't change what is rendered
+    meta = getattr(serializer_class, "Meta", None)
+    meta_options = {name: getattr(meta, name) for name in dir(meta)
+                    if not name.startswith("__") and not name.startswith("cache_")} if meta else {}
+    description = [[(name, _describe_field(field)) for name, field in serializer_class._declared_fields.items()],
+                   _describe(meta_options)]
+    model = meta_options.get("model")
+    if model is not None:
+        # the model fields the generated serializer fields are built from (their type, choices, max_length...)
+        if meta_options.get("fields") == ALL_FIELDS or meta_options.get("exclude"):
+            names = [field.name for field in model._meta.concrete_fields]
+        else:
+            names = [name for name in meta_options.get("fields") or () if name not in serializer_class._declared_fields]
+        description.append([(name, _describe_model_field(model, name)) for name in names])
+    return description
+
+
+def _describe_model_field(model: Type[Model], name: str):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # a property or a method of the model, rendered by a read only field
+        return None
+    if not isinstance(field, ModelField):
+        # a reverse relation
+        return _describe(type(field))
+    _, path, args, kwargs = field.deconstruct()
+    return [path, _describe(args), _describe(kwargs)]
+
+
+def _get_nested_vary_on(serializer_class: Type[BaseSerializer]) -> Dict[str, Callable]:
+    vary_on = getattr(getattr(serializer_class, "Meta", None), "cache_vary_on", None) or {}
+    if not isinstance(vary_on, dict):
+        # by position, names aren't unique (every lambda is "<lambda>")
+        vary_on = {str(i): func for i, func in enumerate(vary_on)}
+    vary_on = dict(vary_on)
+    for field_name, field in getattr(serializer_class, "_declared_fields", {}).items():
+        if isinstance(field, ListSerializer):
+            field = field.child
+        if not isinstance(field, BaseSerializer):
+            continue
+        # plain serializers are walked too, they may nest cached ones
+        nested = type(field)._get_vary_on() if isinstance(field, _CashedSerializerBase) \
+            else _get_nested_vary_on(type(field))
+        vary_on.update((f"{field_name}.{name}", func) for name, func in nested.items())
+    return vary_on
+
+
+_MISSING = object()
+
+_serializer_registry: Dict[str, Type["_CashedSerializerBase"]] = {}
+
+
+def get_registered_serializers() -> List[Type["_CashedSerializerBase"]]:
+    """
+    returns every concrete cached serializer class that was defined so far (in definition order)
+    """
+    return list(_serializer_registry.values())
+
+
+def unregister_serializer(serializer_class: Type["_CashedSerializerBase"]):
+    """
+    removes a serializer from the registry, e.g. one defined by a test module that other tests shouldn't see
+    (the stats and snapshot commands and the recompute signals only look at registered serializers)
+    """
+    _serializer_registry.pop(f"{serializer_class.__module__}.{serializer_class.__qualname__}", None)
+
+
 class _CashedSerializerBase:
     _cache: BaseCache = default_cache
     _key_prefix: str = "sercache"
@@ -33,8 +193,18 @@ class _CashedSerializerBase:
     _context_cache_keys = set()
     _cache_timeout = 60 * 60 * 24
     _cache_version = None
+    # set by the metaclass when the serializer renders with the stock `ModelSerializer.to_representation`,
+    # so a miss may use a renderer compiled for the serializer's fields (see `_get_fast_renderer`)
+    _fast_render = False
+    # field templates built by `get_fields`, keyed by serializer class and `_get_fields_template_key()`
+    _fields_templates: Dict[tuple, Dict] = {}
     model: Model
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls, "Meta", None) is not None:
+            _serializer_registry[f"{cls.__module__}.{cls.__qualname__}"] = cls
+
     def __new__(cls, *args, cache_scope=False, **kwargs):
         # We override this method in order to automagically create
         # `CachedSerializer` classes instead when `many=True` is set.
@@ -42,10 +212,12 @@ class _CashedSerializerBase:
             return cls.many_init(*args, cache_scope=cache_scope, **kwargs)
         return super().__new__(cls, *args, **kwargs)
 
-    def __init__(self, *args, use_cache: Union[bool, str] = True, cache_scope=False, **kwargs) -> None:
+    def __init__(self, *args, use_cache: Union[bool, str] = True, cache_scope=False, two_phase=False,
+                 **kwargs) -> None:
         if isinstance(use_cache, bool):
             use_cache = "true" if use_cache else "false"
         self._use_cache = use_cache
+        self._two_phase = two_phase
         super().__init__(*args, **kwargs)
 
     @classmethod
@@ -66,21 +238,43 @@ class _CashedSerializerBase:
             return CustomListSerializer(*args, **kwargs)
         """
         allow_empty = kwargs.pop('allow_empty', None)
+        use_values = kwargs.pop('use_values', False)
         child_serializer = cls(*args, **kwargs)
         list_kwargs = {
             'child': child_serializer,
-            'cache_scope': cache_scope
+            'cache_scope': cache_scope,
+            'use_values': use_values,
         }
         if allow_empty is not None:
             list_kwargs['allow_empty'] = allow_empty
         list_kwargs.update({
             key: value for key, value in kwargs.items()
-            if key in LIST_SERIALIZER_KWARGS + ("cache_scope",)
+            if key in LIST_SERIALIZER_KWARGS + ("cache_scope", "two_phase", "use_values")
         })
         meta = getattr(cls, 'Meta', None)
         list_serializer_class = getattr(meta, 'list_serializer_class', CachedListSerializer)
         return list_serializer_class(*args, **list_kwargs)
 
+    def _get_fields_template_key(self) -> tuple:
+        """
+        the part of the serializer's configuration that changes the fields `get_fields` builds.
+        fields are built once per class and key and then cloned for every instance,
+        override this if your serializer builds its fields based on constructor arguments.
+        """
+        return ()
+
+    def get_fields(self):
+        org_get_fields = super().get_fields
+        # a custom `get_fields` below us in the mro may depend on the context, only the stock ones are safe to share
+        if org_get_fields.__func__ not in (ModelSerializer.get_fields, Serializer.get_fields):
+            return org_get_fields()
+        template_key = (type(self), self._get_fields_template_key())
+        template = self._fields_templates.get(template_key)
+        if template is None:
+            template = self._fields_templates[template_key] = org_get_fields()
+        declared_fields = self._declared_fields
+        return OrderedDict((name, _clone_field(field, name in declared_fields)) for name, field in template.items())
+
     def _is_in_scope(self) -> bool:
         return self._context_cache_count > 0
 
@@ -92,32 +286,100 @@ class _CashedSerializerBase:
     def _generate_cache_key(cls, instance) -> str:
         pass
 
+    @classmethod
+    def _get_vary_on(cls) -> Dict[str, Callable]:
+        """
+        the context dimensions of `Meta.cache_vary_on` by name, plus the ones of every cached serializer nested
+        in this one (at all depths, named after their field path). a parent caches the output of its nested
+        serializers, so it has to vary on whatever they vary on. computed once per class.
+        """
+        vary_on = cls.__dict__.get("_vary_on")
+        if vary_on is None:
+            vary_on = cls._vary_on = _get_nested_vary_on(cls)
+        return vary_on
+
+    def _get_vary_key_suffix(self) -> str:
+        """
+        `Meta.cache_vary_on` lists the context dimensions the output depends on, either as a dict of
+        {name: callable} or a sequence of callables (keyed by their position), every callable gets
+        `self.context` and returns the dimension's value. a dimension that doesn't apply returns None and is
+        left out of the key, so all contexts without it share one variant (the same one as a serializer without
+        `cache_vary_on`). the dimensions of nested cached serializers are included, see `_get_vary_on`.
+        the suffix is computed once per serializer instance, the context doesn't change while rendering.
+        """
+        suffix = self.__dict__.get("_vary_key_suffix")
+        if suffix is None:
+            context = self.context
+            values = sorted((name, func(context)) for name, func in self._get_vary_on().items())
+            values = [(name, value) for name, value in values if value is not None]
+            suffix = f"_v{hashlib.md5(repr(values).encode()).hexdigest()[:12]}" if values else ""
+            self._vary_key_suffix = suffix
+        return suffix
+
+    def _get_cache_key(self, instance) -> str:
+        return self._generate_cache_key(instance) + self._get_vary_key_suffix()
+
+    @classmethod
+    def _get_schema_fingerprint(cls) -> str:
+        """
+        a digest of the serializer's definition: its declared fields with their options, the structure of every
+        serializer nested in it (cached or not), its `Meta` and the definition of the model fields it renders
+        (every concrete field for `"__all__"` or `exclude`). it is part of the key prefix, so changing a
+        serializer only makes that serializer (and the ones nesting it) start cold. code isn't part of it:
+        changes to method field bodies or to a custom `to_representation` still need a `Meta.cache_version`
+        bump or a flush.
+        computed when the class is decorated, or on first use for subclasses created without the decorator /
+        metaclass.
+        """
+        fingerprint = cls.__dict__.get("_schema_fingerprint")
+        if fingerprint is None:
+            fingerprint = hashlib.md5(repr(_describe_serializer_class(cls)).encode()).hexdigest()[:12]
+            cls._schema_fingerprint = fingerprint
+        return fingerprint
+
     @classmethod
     def _get_cache_key_prefix(cls) -> str:
+        name = f"{cls.__name__.lower()}_{cls._get_schema_fingerprint()}"
         if cls._context_cache_count > 0:
-            return f"{cls._key_prefix}_{cls._context_cache_prefix}_{cls.__class__.__name__.lower()}"
+            return f"{cls._key_prefix}_{cls._context_cache_prefix}_{name}"
         else:
-            return f"{cls._key_prefix}_{cls.__class__.__name__.lower()}"
+            return f"{cls._key_prefix}_{name}"
 
     def _cache_add(self, key, value):
         self.get_cache().add(key, value, self._cache_timeout, self._cache_version)
         if self._context_cache_count > 0:
             self._context_cache_keys.add(key)
 
+    def _cache_set_many(self, data: Dict[str, OrderedDict]):
+        self.get_cache().set_many(data, self._cache_timeout, version=self._cache_version)
+        if self._context_cache_count > 0:
+            self._context_cache_keys.update(data)
+
     @classmethod
     @contextmanager
     def cache_scope(cls):
         if cls._context_cache_count == 0:
             cls._context_cache_prefix = str(datetime.datetime.now().timestamp()).replace(".", "_")
         cls._context_cache_count += 1
-        yield
-        cls._context_cache_count -= 1
-        if cls._context_cache_count == 0 and cls._context_cache_keys:
-            cls.get_cache().delete_many(cls._context_cache_keys, cls._cache_version)
-            cls._context_cache_keys = set()
+        try:
+            yield
+        finally:
+            # also when the body raises or a generator holding the scope is closed early
+            cls._context_cache_count -= 1
+            if cls._context_cache_count == 0 and cls._context_cache_keys:
+                cls.get_cache().delete_many(cls._context_cache_keys, cls._cache_version)
+                cls._context_cache_keys = set()
 
     def invalidate_cache(self):
-        return self._cache.delete(self._generate_cache_key(self.instance), version=self._cache_version)
+        """
+        removes the cached representation of the serializer's instance for its own context and the
+        shared variant, other variants of `cache_vary_on` serializers are left to expire.
+        """
+        key = self._generate_cache_key(self.instance)
+        variant_key = key + self._get_vary_key_suffix()
+        if variant_key == key:
+            return self.get_cache().delete(key, version=self._cache_version)
+        return self.get_cache().delete_many([key, variant_key], version=self._cache_version)
 
     @classmethod
     def get_cache(cls) -> BaseCache:
@@ -128,23 +390,222 @@ class _CashedSerializerBase:
 
 class CachedListSerializer(ListSerializer):
 
-    def __init__(self, *args, cache_scope=False, **kwargs):
+    def __init__(self, *args, cache_scope=False, two_phase=False, use_values=False, **kwargs):
         super().__init__(*args, **kwargs)
         self._cache_scope = cache_scope
+        self._two_phase = two_phase
+        self._use_values = use_values
 
     def _generate_cache_key(self, instance) -> str:
         return self.child._generate_cache_key(instance)
 
+    def _get_cache_key(self, instance) -> str:
+        return self.child._get_cache_key(instance)
+
+    def get_attribute(self, instance):
+        plan = _active_render_plan.get()
+        if plan is not None:
+            items = plan.get_collected_items(self, instance)
+            if items is not None:
+                return items
+        return super().get_attribute(instance)
+
     def to_representation(self, data):
         if self._cache_scope:
             with self.child.cache_scope():
-                return super().to_representation(data)
+                return self._to_representation(data)
         else:
+            return self._to_representation(data)
+
+    def _to_representation(self, data):
+        # only for children rendering with the stock `to_representation`, an override would be skipped
+        if self._use_values and self.child._fast_render and isinstance(data, (QuerySet, Manager)) \
+                and hasattr(self.child, "_to_representation_from_values"):
+            ret = self.child._to_representation_from_values(data.all())
+            if ret is not None:
+                return ret
+        looked_up = isinstance(data, LookedUpList)
+        if not (self._two_phase or looked_up) or _active_render_plan.get() is not None:
             return super().to_representation(data)
+        items = list(data.all() if isinstance(data, Manager) else data)
+        plan = _RenderPlan()
+        if looked_up:
+            plan.seed(data.looked_up_keys, data.found)
+        return plan.render(self.child, items, lambda: super(CachedListSerializer, self).to_representation(items))
+
+    def iter_representation(self, data=None, chunk_size: int = 500):
+        """
+        yields the representation of every item like `to_representation` does, but one chunk of `chunk_size`
+        items at a time so memory stays bounded by the chunk instead of the whole result. querysets are read
+        with `iterator()`, and every chunk is rendered in two phases, fetching its cached items with one
+        `get_many` and writing back its misses with one `set_many`. the queryset's `prefetch_related` lookups
+        are only applied to the items that missed the cache. nothing is kept in `self.data`.
+        """
+        data = self.instance if data is None else data
+        if isinstance(data, Manager):
+            data = data.all()
+        if self._cache_scope:
+            with self.child.cache_scope():
+                yield from self._iter_representation(data, chunk_size)
+        else:
+            yield from self._iter_representation(data, chunk_size)
+
+    def _iter_representation(self, data, chunk_size: int):
+        prefetch_lookups = ()
+        if isinstance(data, QuerySet):
+            # `iterator()` ignores `prefetch_related`, the plan applies the lookups to the missed items only
+            prefetch_lookups = data._prefetch_related_lookups
+            data = data.iterator(chunk_size=chunk_size)
+        for chunk in _iter_chunks(data, chunk_size):
+            yield from _RenderPlan().render(self.child, chunk, lambda: [self.child.to_representation(item)
+                                                                        for item in chunk],
+                                            prefetch_lookups=prefetch_lookups)
 
     def invalidate_cache(self):
-        keys = list(map(self._generate_cache_key, self.instance))
-        return self.child._cache.delete_many(keys, self.child._cache_version)
+        keys = set(map(self._generate_cache_key, self.instance)) | set(map(self._get_cache_key, self.instance))
+        return self.child.get_cache().delete_many(keys, self.child._cache_version)
+
+
+def _iter_chunks(data, chunk_size: int):
+    chunk = []
+    for item in data:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class LookedUpList(list):
+    """
+    a list of instances whose cache entries were already looked up, e.g. by a paginator checking which rows
+    it can skip querying. `looked_up_keys` are the keys that were asked for and `found` the entries among
+    them, a `CachedListSerializer` rendering the list answers those keys from `found` instead of the cache.
+    """
+
+    def __init__(self, objects, looked_up_keys, found: Dict[str, OrderedDict]):
+        super().__init__(objects)
+        self.looked_up_keys = set(looked_up_keys)
+        self.found = found
+
+
+_active_render_plan: ContextVar[Optional["_RenderPlan"]] = ContextVar("cachelizer_render_plan", default=None)
+
+
+class _RenderPlan:
+    """
+    renders a serializer tree in two phases, so the cache is hit with a couple of batched calls instead of a
+    round-trip per cached serializer: first the keys of the roots are fetched with a single `get_many`, then
+    the instance graph below the missed roots is walked to collect the keys of every nested cached serializer
+    (at all depths) which are fetched with one more `get_many`. the tree is then rendered, nested lookups are
+    answered from the fetched entries, and everything that had to be rendered is written back with `set_many`.
+    """
+
+    def __init__(self):
+        self._serializers: Dict[str, _CashedSerializerBase] = {}
+        self._fetched = set()
+        self._found: Dict[str, OrderedDict] = {}
+        self._rendered: Dict[str, _CashedSerializerBase] = {}
+        # evaluated related managers of list fields, keyed by (id(field), id(instance))
+        self._items: Dict[tuple, tuple] = {}
+
+    def render(self, serializer: "_CashedSerializerBase", instances: List, render: Callable, prefetch_lookups=()):
+        """
+        `prefetch_lookups` are applied to the roots that missed the cache, before walking them
+        """
+        root_keys = [self._add_key(serializer, instance) for instance in instances]
+        self._fetch()
+        missed = [instance for instance, key in zip(instances, root_keys) if key not in self._found]
+        if prefetch_lookups:
+            prefetch_related_objects(missed, *prefetch_lookups)
+        for instance in missed:
+            self._collect_nested(serializer, instance)
+        self._fetch()
+
+        token = _active_render_plan.set(self)
+        try:
+            ret = render()
+        finally:
+            _active_render_plan.reset(token)
+        self._store()
+        return ret
+
+    def seed(self, keys, found: Dict[str, OrderedDict]):
+        """
+        marks `keys` as fetched, with `found` the entries that were in the cache
+        """
+        self._fetched.update(keys)
+        self._found.update(found)
+
+    def _add_key(self, serializer: "_CashedSerializerBase", instance) -> Optional[str]:
+        if not serializer._get_do_use_cache():
+            return None
+        key = serializer._get_cache_key(instance)
+        self._serializers.setdefault(key, serializer)
+        return key
+
+    def _collect(self, serializer: Serializer, instance):
+        if isinstance(serializer, _CashedSerializerBase) and serializer._get_do_use_cache():
+            key = serializer._get_cache_key(instance)
+            if key in self._serializers:
+                # already collected, e.g. the same pet of two people
+                return
+            self._serializers[key] = serializer
+        self._collect_nested(serializer, instance)
+
+    def _collect_nested(self, serializer: Serializer, instance):
+        for field in serializer.fields.values():
+            if field.write_only or not isinstance(field, (CachedListSerializer, _CashedSerializerBase)):
+                continue
+            try:
+                attribute = field.get_attribute(instance)
+            except (SkipField, AttributeError, KeyError, ObjectDoesNotExist):
+                # let the actual rendering deal with it
+                continue
+            if attribute is None:
+                continue
+            if isinstance(field, CachedListSerializer):
+                items = list(attribute.all() if isinstance(attribute, Manager) else attribute)
+                self._items[(id(field), id(instance))] = (instance, items)
+                for item in items:
+                    self._collect(field.child, item)
+            else:
+                self._collect(field, attribute)
+
+    def _fetch(self):
+        groups: Dict[tuple, List[str]] = {}
+        for key, serializer in self._serializers.items():
+            if key not in self._fetched:
+                groups.setdefault((serializer.get_cache(), serializer._cache_version), []).append(key)
+                self._fetched.add(key)
+        for (cache, version), keys in groups.items():
+            self._found.update(cache.get_many(keys, version=version))
+
+    def _store(self):
+        groups: Dict[tuple, Dict[str, OrderedDict]] = {}
+        for key, serializer in self._rendered.items():
+            group_key = (serializer.get_cache(), serializer._cache_version, serializer._cache_timeout)
+            groups.setdefault(group_key, {})[key] = self._found[key]
+            if serializer._context_cache_count > 0:
+                serializer._context_cache_keys.add(key)
+        for (cache, version, timeout), data in groups.items():
+            cache.set_many(data, timeout, version=version)
+
+    def get_collected_items(self, field: "CachedListSerializer", instance) -> Optional[List]:
+        # the instance is kept in the value so its id can't be reused while the plan is alive
+        _, items = self._items.get((id(field), id(instance)), (None, None))
+        return items
+
+    def knows(self, key: str) -> bool:
+        return key in self._fetched
+
+    def get(self, key: str):
+        return self._found.get(key, _MISSING)
+
+    def add_rendered(self, serializer: "_CashedSerializerBase", key: str, rep: OrderedDict):
+        self._found[key] = rep
+        self._rendered[key] = serializer
 
 
 class __CashedRegularSerializer(_CashedSerializerBase):
@@ -171,16 +632,110 @@ class __CashedModelSerializer(_CashedSerializerBase):
         model = cls._get_model()
         return f"{cls._get_cache_key_prefix()}_{model._meta.verbose_name}_#{hash(instance)}"
 
+    @classmethod
+    def _generate_cache_key_for_pk(cls, pk) -> str:
+        # model instances hash by their pk, so this matches `_generate_cache_key` for a saved instance
+        model = cls._get_model()
+        return f"{cls._get_cache_key_prefix()}_{model._meta.verbose_name}_#{hash(pk)}"
 
-def _to_representation_helper(self: _CashedSerializerBase, instance, org_to_representation: Callable):
-    if not self._get_do_use_cache():
+    def _get_cache_key_for_pk(self, pk) -> str:
+        return self._generate_cache_key_for_pk(pk) + self._get_vary_key_suffix()
+
+    def _get_fast_render_fields(self) -> Optional[tuple]:
+        """
+        the (field name, attname, converter) of every readable field when all of them are plain model fields
+        rendered by DRF's stock fields, None otherwise
+        """
+        model = self._get_model()
+        fields = []
+        for field in self._readable_fields:
+            field_class = type(field)
+            if field_class.get_attribute is not Field.get_attribute or len(field.source_attrs) != 1 \
+                    or field_class.to_representation not in _FAST_RENDER_CONVERTERS:
+                return None
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None
+            if not model_field.concrete or model_field.is_relation or model_field.attname != field.source_attrs[0]:
+                return None
+            converter = _FAST_RENDER_CONVERTERS[field_class.to_representation]
+            fields.append((field.field_name, model_field.attname, converter or field.to_representation))
+        return tuple(fields)
+
+    def _get_fast_renderer(self, from_values=False) -> Optional[Callable]:
+        """
+        a renderer generated for the serializer's fields, with the same output as `to_representation`
+        without going through the bound fields' `get_attribute` one by one. None when the serializer has
+        fields that aren't plain model fields (nested, relations, method fields, custom field classes, ...).
+        """
+        renderers = self.__dict__.setdefault("_fast_renderers", {})
+        if from_values not in renderers:
+            fields = self._get_fast_render_fields()
+            if fields is None:
+                renderers[from_values] = None
+            else:
+                factory = _get_renderer_factory(tuple((name, attname, converter is _RAW)
+                                                      for name, attname, converter in fields), from_values)
+                renderers[from_values] = factory(*(converter for _, _, converter in fields))
+        return renderers[from_values]
+
+    def _to_representation_from_values(self, queryset: QuerySet) -> Optional[List[OrderedDict]]:
+        """
+        renders the rows of the queryset from `.values()`, without building model instances, and serves and
+        stores them in the cache under the same keys as the instances. returns None when the serializer
+        doesn't qualify for the fast renderer.
+        """
+        renderer = self._get_fast_renderer(from_values=True)
+        if renderer is None:
+            return None
+        pk_attname = self._get_model()._meta.pk.attname
+        attnames = dict.fromkeys((pk_attname, *(attname for _, attname, _ in self._get_fast_render_fields())))
+        rows = queryset.prefetch_related(None).values(*attnames)
+        if not self._get_do_use_cache():
+            return [renderer(row) for row in rows]
+
+        # a row can come up more than once (e.g. a join), it is rendered once but kept at every position
+        rows = list(rows)
+        keys = [self._get_cache_key_for_pk(row[pk_attname]) for row in rows]
+        found = self.get_cache().get_many(list(dict.fromkeys(keys)), version=self._cache_version)
+        rendered = {}
+        for key, row in zip(keys, rows):
+            if key not in found and key not in rendered:
+                rendered[key] = renderer(row)
+        if rendered:
+            self._cache_set_many(rendered)
+        return [found[key] if key in found else rendered[key] for key in keys]
+
+
+def _render(self: _CashedSerializerBase, instance, org_to_representation: Callable):
+    renderer = self._get_fast_renderer() if self._fast_render else None
+    if renderer is None:
         return org_to_representation(self, instance)
+    return renderer(instance)
+
 
-    key = self._generate_cache_key(instance)
-    if key in self._cache:
-        return self._cache.get(key)
-    rep = org_to_representation(self, instance)
-    self._cache_add(key, rep)
+def _to_representation_helper(self: _CashedSerializerBase, instance, org_to_representation: Callable):
+    plan = _active_render_plan.get()
+    if self._two_phase and plan is None:
+        return _RenderPlan().render(self, [instance],
+                                    lambda: _to_representation_helper(self, instance, org_to_representation))
+
+    if not self._get_do_use_cache():
+        return _render(self, instance, org_to_representation)
+
+    key = self._get_cache_key(instance)
+    if plan is not None and plan.knows(key):
+        rep = plan.get(key)
+        if rep is _MISSING:
+            rep = _render(self, instance, org_to_representation)
+            plan.add_rendered(self, key, rep)
+        return rep
+
+    rep = self.get_cache().get(key, _MISSING, version=self._cache_version)
+    if rep is _MISSING:
+        rep = _render(self, instance, org_to_representation)
+        self._cache_add(key, rep)
     return rep
 
 
@@ -200,13 +755,19 @@ def _decorate_serializer_class(name: str,
     if cache is str:
         cache = caches[cache]
     dict_ = dict_ or {}
+    if cache_version is None:
+        meta = dict_.get("Meta") or getattr(_first_true(bases, pred=lambda b: hasattr(b, "Meta")), "Meta", None)
+        cache_version = getattr(meta, "cache_version", None)
 
     extra = {
         **dict_,
         "_cache": cache,
         "_key_prefix": key_prefix,
         "_cache_timeout": cache_timeout,
-        cache_version: cache_version,
+        "_cache_version": cache_version,
+        # `ModelSerializer.to_representation` is `Serializer.to_representation`, only model serializers qualify
+        "_fast_render": (serializer_type == ModelSerializer
+                         and org_to_representation is ModelSerializer.to_representation),
     }
 
     if serializer_type == ModelSerializer:
@@ -228,7 +789,9 @@ def _decorate_serializer_class(name: str,
 
         extra["update"] = _update
 
-    return type(name, (*bases,), extra)
+    serializer_class = type(name, (*bases,), extra)
+    serializer_class._get_schema_fingerprint()
+    return serializer_class
 
 
 class CashedSerializerMeta(SerializerMetaclass):
@@ -277,10 +840,13 @@ def cached_serializer(cls: Type[Serializer],
         serializer_type = Serializer
     else:
         raise ValueError("can only decorate serializer class")
+    # keep the module and the qualified name of the decorated class, the registry and the recompute queue
+    # find serializers by their dotted path
     return _decorate_serializer_class(cls.__name__, [cls], cls.to_representation, cls.update,
                                       serializer_type, cache=cache, key_prefix=key_prefix,
                                       cache_timeout=cache_timeout, cache_version=cache_version,
-                                      auto_invalidate=auto_invalidate)
+                                      auto_invalidate=auto_invalidate,
+                                      dict_={"__module__": cls.__module__, "__qualname__": cls.__qualname__})
 
 
 class CashedSerializer(__CashedRegularSerializer, Serializer):
@@ -289,5 +855,7 @@ class CashedSerializer(__CashedRegularSerializer, Serializer):
 
 
 class CashedModelSerializer(__CashedModelSerializer, ModelSerializer):
+    _fast_render = True
+
     def to_representation(self, instance):
         return _to_representation_helper(self, instance, ModelSerializer.to_representation)
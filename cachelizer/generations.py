@@ -0,0 +1,86 @@
+import time
+from typing import Optional, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import transaction
+from django.db.models import Model
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+GENERATION_KEY_PREFIX = "cachelizer_generation"
+
+
+def _get_generation_cache() -> BaseCache:
+    return caches[settings.CACHELIZER_DEFAULT_CACHE]
+
+
+def _generation_key(model: Type[Model]) -> str:
+    return f"{GENERATION_KEY_PREFIX}_{model._meta.label_lower}"
+
+
+def _initial_generation() -> int:
+    # counters start from the clock, so a counter that got evicted can't come back
+    # with a value that was already used by entries still sitting in the cache
+    return int(time.time() * 1000)
+
+
+def get_model_generation(model: Type[Model]) -> int:
+    """
+    returns the current generation of the model, a counter that moves every time a row of the model
+    is saved or deleted (or an m2m relation of it changes), once the write commits. keys that include it
+    go stale on any write.
+    """
+    cache = _get_generation_cache()
+    key = _generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_model_generation(model: Type[Model]):
+    """
+    moves the model's generation forward. this is done automatically through signals,
+    call it yourself after writes that don't send them (`QuerySet.update`, `bulk_create`, raw sql...)
+    """
+    cache = _get_generation_cache()
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_generation(), None)
+    else:
+        # backends without a native incr re-set the value with the default timeout, counters must not expire
+        cache.touch(key, None)
+
+
+def peek_model_generation(model: Type[Model]) -> Optional[int]:
+    """
+    returns the model's current generation without starting one, None when the cache has no counter for it
+    (never used, evicted or a fresh cache), in which case nobody can tell what was written before.
+    """
+    return _get_generation_cache().get(_generation_key(model))
+
+
+def _bump_on_commit(models, using: str):
+    # a reader running before the write commits would still see the old rows, bumping right away would let it
+    # cache them under the new generation. outside of a transaction this runs immediately
+    transaction.on_commit(lambda: [bump_model_generation(model) for model in models], using=using)
+
+
+def _on_save_or_delete(sender, using, **kwargs):
+    _bump_on_commit((sender,), using)
+
+
+def _on_m2m_changed(sender, instance, action, model, using, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    _bump_on_commit((sender, type(instance), model), using)
+
+
+def connect_signals():
+    post_save.connect(_on_save_or_delete, dispatch_uid="cachelizer_generation_post_save")
+    post_delete.connect(_on_save_or_delete, dispatch_uid="cachelizer_generation_post_delete")
+    m2m_changed.connect(_on_m2m_changed, dispatch_uid="cachelizer_generation_m2m_changed")
@@ -0,0 +1,280 @@
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.db.backends.utils import CursorWrapper
+from django.test import Client, AsyncClient
+from django.test.utils import override_settings
+
+from cachelizer.cache_serializer import get_registered_serializers
+from cachelizer.models import Person, Group, Dog
+
+SCENARIOS = ("cold", "warm", "mixed")
+CACHE_METHODS = ("get", "get_many", "set", "set_many", "add", "delete", "delete_many", "has_key", "incr", "touch")
+
+
+class CallCounters:
+    """
+    counts the sql statements and the cache calls made by every thread while `install()` is active, the
+    cache calls in total and per method (`cache_methods`). cache calls made from within another cache call of
+    the same thread (e.g. the base `get_many` looping over `get`) are not counted again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.sql = 0
+        self.cache = 0
+        self.cache_methods: Dict[str, int] = {}
+
+    def _add(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _add_cache_call(self, method: str):
+        with self._lock:
+            self.cache += 1
+            self.cache_methods[method] = self.cache_methods.get(method, 0) + 1
+
+    def _wrap_cache_method(self, method: str, org):
+        def wrapper(*args, **kwargs):
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                self._add_cache_call(method)
+            self._local.depth = depth + 1
+            try:
+                return org(*args, **kwargs)
+            finally:
+                self._local.depth = depth
+        return wrapper
+
+    def _wrap_sql_method(self, org):
+        def wrapper(*args, **kwargs):
+            self._add("sql")
+            return org(*args, **kwargs)
+        return wrapper
+
+    @contextmanager
+    def install(self):
+        patched = [(CursorWrapper, name, self._wrap_sql_method(getattr(CursorWrapper, name)))
+                   for name in ("execute", "executemany")]
+        cache_classes = {type(caches[alias]) for alias in settings.CACHES}
+        for cache_class in cache_classes:
+            for name in CACHE_METHODS:
+                patched.append((cache_class, name, self._wrap_cache_method(name, getattr(cache_class, name))))
+
+        originals = [(klass, name, klass.__dict__.get(name)) for klass, name, _ in patched]
+        for klass, name, wrapper in patched:
+            setattr(klass, name, wrapper)
+        try:
+            yield self
+        finally:
+            for klass, name, original in originals:
+                if original is None:
+                    delattr(klass, name)
+                else:
+                    setattr(klass, name, original)
+
+
+class LoadReport:
+
+    def __init__(self, scenario: str, client: str, latencies: List[float], duration: float, errors: int,
+                 sql: int, cache_calls: int, writes: int):
+        self.scenario = scenario
+        self.client = client
+        self.latencies = sorted(latencies)
+        self.duration = duration
+        self.errors = errors
+        self.sql = sql
+        self.cache_calls = cache_calls
+        self.writes = writes
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, percent: float) -> float:
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(len(self.latencies) - 1, int(percent / 100 * len(self.latencies)))]
+
+    def as_dict(self) -> Dict:
+        return {
+            "scenario": self.scenario,
+            "client": self.client,
+            "requests": self.requests,
+            "writes": self.writes,
+            "errors": self.errors,
+            "requests_per_second": round(self.requests_per_second, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "sql_per_request": round(self.sql / self.requests, 2) if self.requests else 0.0,
+            "cache_calls_per_request": round(self.cache_calls / self.requests, 2) if self.requests else 0.0,
+        }
+
+    def __str__(self):
+        return json.dumps(self.as_dict())
+
+
+def build_paths(sample: int = 50, page_size: int = 50) -> List[str]:
+    """
+    a mix of list pages and detail urls over the demo endpoints
+    """
+    paths = []
+    for prefix, model in (("people", Person), ("groups", Group), ("dogs", Dog)):
+        pks = list(model.objects.order_by("?").values_list("pk", flat=True)[:sample])
+        paths.extend(f"/api/{prefix}/{pk}/" for pk in pks)
+        pages = max(1, (model.objects.count() + page_size - 1) // page_size)
+        paths.extend(f"/api/{prefix}/?page={page}" for page in range(1, min(pages, 5) + 1))
+    return paths
+
+
+class LoadDriver:
+    """
+    drives the demo api in process through django's test clients, either from a pool of threads (wsgi)
+    or from concurrent tasks on an event loop (asgi), and reports throughput, latency percentiles and the
+    sql statements and cache calls per request.
+
+    scenarios: `cold` clears the caches first, `warm` requests every path once before measuring and `mixed`
+    is warm with `write_ratio` of the requests replaced by a PATCH of a random person. the public urls are
+    read only, the driver routes the requests through `cachelizer.loadtest_urls` which adds the write route.
+    with `profile_dir` a cProfile dump (`<scenario>-<client>.prof`, readable by pstats, snakeviz or
+    flameprof) is written per run. only the wsgi client is profiled, the asgi one runs the views in
+    threads the profiler doesn't follow.
+    """
+
+    def __init__(self, paths: List[str], requests: int = 500, concurrency: int = 8, client: str = "wsgi",
+                 write_ratio: float = 0.05, profile_dir: Optional[str] = None, seed: Optional[int] = None):
+        if client not in ("wsgi", "asgi"):
+            raise ValueError("client must be 'wsgi' or 'asgi'")
+        self.paths = paths
+        self.requests = requests
+        self.concurrency = concurrency
+        self.client = client
+        self.write_ratio = write_ratio
+        self.profile_dir = profile_dir
+        self._random = random.Random(seed)
+        self._person_pks = list(Person.objects.values_list("pk", flat=True)[:1000])
+
+    def _plan(self, scenario: str) -> List[tuple]:
+        plan = []
+        for i in range(self.requests):
+            if scenario == "mixed" and self._person_pks and self._random.random() < self.write_ratio:
+                pk = self._random.choice(self._person_pks)
+                plan.append(("patch", f"/api/people/{pk}/", {"first_name": f"Name {i}"}))
+            else:
+                plan.append(("get", self._random.choice(self.paths), None))
+        return plan
+
+    def _prepare(self, scenario: str):
+        # only the caches of the cached serializers, not every cache the settings point at
+        serializer_caches = {}
+        for serializer_class in get_registered_serializers():
+            cache = serializer_class.get_cache()
+            serializer_caches[id(cache)] = cache
+        for cache in serializer_caches.values():
+            cache.clear()
+        if scenario in ("warm", "mixed"):
+            client = Client()
+            for path in self.paths:
+                client.get(path)
+
+    def run(self, scenario: str) -> LoadReport:
+        if scenario not in SCENARIOS:
+            raise ValueError(f"unknown scenario {scenario}, expected one of {', '.join(SCENARIOS)}")
+        with override_settings(ROOT_URLCONF="cachelizer.loadtest_urls"):
+            return self._run(scenario)
+
+    def _run(self, scenario: str) -> LoadReport:
+        self._prepare(scenario)
+        plan = self._plan(scenario)
+        counters = CallCounters()
+        profiles = []
+        with counters.install():
+            start = time.perf_counter()
+            if self.client == "wsgi":
+                results = self._run_wsgi(plan, profiles)
+            else:
+                results = self._run_asgi(plan)
+            duration = time.perf_counter() - start
+
+        if self.profile_dir and profiles:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(os.path.join(self.profile_dir, f"{scenario}-{self.client}.prof"))
+
+        return LoadReport(scenario, self.client,
+                          latencies=[latency for latency, _ in results],
+                          duration=duration,
+                          errors=sum(1 for _, status in results if status >= 400),
+                          sql=counters.sql, cache_calls=counters.cache,
+                          writes=sum(1 for method, _, _ in plan if method == "patch"))
+
+    @staticmethod
+    def _request(client, method: str, path: str, data):
+        if method == "patch":
+            return client.patch(path, data=json.dumps(data), content_type="application/json")
+        return client.get(path)
+
+    def _run_wsgi(self, plan: List[tuple], profiles: List) -> List[tuple]:
+        chunks = [plan[i::self.concurrency] for i in range(self.concurrency)]
+
+        def worker(chunk):
+            client = Client()
+            profile = cProfile.Profile() if self.profile_dir else None
+            results = []
+            try:
+                for method, path, data in chunk:
+                    start = time.perf_counter()
+                    if profile:
+                        profile.enable()
+                    response = self._request(client, method, path, data)
+                    if profile:
+                        profile.disable()
+                    results.append((time.perf_counter() - start, response.status_code))
+            finally:
+                close_old_connections()
+            return results, profile
+
+        results = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for chunk_results, profile in executor.map(worker, chunks):
+                results.extend(chunk_results)
+                if profile is not None:
+                    profiles.append(profile)
+        return results
+
+    def _run_asgi(self, plan: List[tuple]) -> List[tuple]:
+        async def request(client, semaphore, method, path, data):
+            async with semaphore:
+                start = time.perf_counter()
+                if method == "patch":
+                    response = await client.patch(path, data=json.dumps(data), content_type="application/json")
+                else:
+                    response = await client.get(path)
+                return time.perf_counter() - start, response.status_code
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(*(request(client, semaphore, *item) for item in plan))
+
+        # run the loop in its own thread, django refuses sync db access from a thread running an event loop
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return list(executor.submit(asyncio.run, run()).result())
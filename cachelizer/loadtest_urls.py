@@ -0,0 +1,9 @@
+from django.urls import include, path
+
+from cachelizer import views
+
+# the demo api with a write route, only routed by the load testing harness (see `LoadDriver`)
+urlpatterns = [
+    path('api/people/<int:pk>/', views.PersonUpdate.as_view(), name='person-update'),
+    path('api/', include('cachelizer.urls')),
+]
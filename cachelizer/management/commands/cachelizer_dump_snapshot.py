@@ -0,0 +1,24 @@
+import gzip
+
+from django.core.management.base import BaseCommand
+
+from cachelizer.management.utils import add_serializer_arguments, get_selected_serializers
+from cachelizer.snapshot import dump_snapshot
+
+
+class Command(BaseCommand):
+    help = "Dumps the cached representations of the registered cached serializers to a snapshot file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="the snapshot file, gzipped when it ends with .gz")
+        parser.add_argument("--sample", type=int, default=None,
+                            help="dump a random sample of this many rows per serializer instead of all of them")
+        add_serializer_arguments(parser)
+
+    def handle(self, *args, **options):
+        serializer_classes = get_selected_serializers(options)
+        path = options["path"]
+        with (gzip.open if path.endswith(".gz") else open)(path, "wb") as file:
+            counts = dump_snapshot(file, serializer_classes, sample=options["sample"])
+        for serializer, count in counts.items():
+            self.stdout.write(f"{serializer}: {count} entries")
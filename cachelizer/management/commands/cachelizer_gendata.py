@@ -0,0 +1,54 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cachelizer.generations import bump_model_generation
+from cachelizer.models import Person, Group, Dog
+
+
+def _bulk_create(model, objs):
+    objs = model.objects.bulk_create(objs)
+    if objs and objs[0].pk is None:
+        # not every database returns the pks of bulk created rows (sqlite doesn't), fetch them back
+        objs = list(reversed(model.objects.order_by("-pk")[:len(objs)]))
+    return objs
+
+
+class Command(BaseCommand):
+    help = "Fills the database with demo dogs, people and groups for load testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dogs", type=int, default=200)
+        parser.add_argument("--people", type=int, default=2000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--group-size", type=int, default=20, help="people per group")
+        parser.add_argument("--clear", action="store_true", help="delete the existing demo data first")
+        parser.add_argument("--seed", type=int, default=None)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rnd = random.Random(options["seed"])
+        if options["clear"]:
+            Group.objects.all().delete()
+            Person.objects.all().delete()
+            Dog.objects.all().delete()
+
+        # bulk_create skips the save signals, the generations are bumped by hand at the end
+        dogs = _bulk_create(Dog, [Dog(name=f"Dog {i}") for i in range(options["dogs"])])
+        people = _bulk_create(Person, [
+            Person(first_name=f"First {i}", last_name=f"Last {i}",
+                   pet=rnd.choice(dogs) if dogs and rnd.random() < 0.7 else None)
+            for i in range(options["people"])])
+        offset = Group.objects.count()
+        groups = _bulk_create(Group, [Group(name=f"Group {offset + i}") for i in range(options["groups"])])
+
+        membership = Person.groups.through
+        membership.objects.bulk_create(
+            membership(group_id=group.pk, person_id=person.pk)
+            for group in groups
+            for person in rnd.sample(people, min(options["group_size"], len(people))))
+
+        for model in (Dog, Person, Group, membership):
+            bump_model_generation(model)
+        self.stdout.write(f"created {len(dogs)} dogs, {len(people)} people and {len(groups)} groups")
@@ -0,0 +1,31 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cachelizer.management.utils import load_serializers
+from cachelizer.snapshot import load_snapshot, SnapshotError
+
+
+class Command(BaseCommand):
+    help = "Loads a snapshot written by cachelizer_dump_snapshot into the cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="the snapshot file, gzipped when it ends with .gz")
+        parser.add_argument("--batch-size", type=int, default=500, help="entries per set_many call")
+        parser.add_argument("--force", action="store_true",
+                            help="also load serializers whose model generations are unknown to the cache "
+                                 "(e.g. on a fresh node), only when the rows didn't change since the dump")
+        parser.add_argument("--module", action="append", default=[],
+                            help="extra module to import so its serializers get registered, can be repeated")
+
+    def handle(self, *args, **options):
+        load_serializers(options["module"])
+        path = options["path"]
+        try:
+            with (gzip.open if path.endswith(".gz") else open)(path, "rb") as file:
+                sections = load_snapshot(file, batch_size=options["batch_size"], force=options["force"])
+        except (OSError, SnapshotError) as e:
+            raise CommandError(f"can't load {path}: {e}")
+        for section in sections:
+            line = f"{section.serializer}: {section.loaded} loaded, {section.skipped} skipped"
+            self.stdout.write(line if section.reason is None else f"{line} ({section.reason})")
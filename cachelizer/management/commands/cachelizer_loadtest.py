@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from cachelizer.loadtest import LoadDriver, SCENARIOS, build_paths
+
+
+class Command(BaseCommand):
+    help = "Load tests the demo api in process and reports throughput, latencies, sql and cache calls per request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=SCENARIOS, default=[],
+                            help="cold, warm or mixed, can be repeated (default: all of them)")
+        parser.add_argument("--client", action="append", choices=("wsgi", "asgi"), default=[],
+                            help="wsgi (threads) or asgi (event loop), can be repeated (default: wsgi)")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--write-ratio", type=float, default=0.05, help="share of writes in the mixed scenario")
+        parser.add_argument("--profile-dir", default=None, help="write a cProfile dump per run into this directory")
+        parser.add_argument("--seed", type=int, default=None)
+
+    def handle(self, *args, **options):
+        paths = build_paths()
+        if not paths:
+            raise CommandError("no data to request, run cachelizer_gendata first")
+        # the test clients send requests to "testserver"
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for client in options["client"] or ["wsgi"]:
+                driver = LoadDriver(paths, requests=options["requests"], concurrency=options["concurrency"],
+                                    client=client, write_ratio=options["write_ratio"],
+                                    profile_dir=options["profile_dir"], seed=options["seed"])
+                for scenario in options["scenario"] or SCENARIOS:
+                    self.stdout.write(str(driver.run(scenario)))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from cachelizer.management.utils import add_serializer_arguments, get_selected_serializers
+from cachelizer.stats import collect_serializer_stats, get_cache_adapter
+
+
+def _fmt(value, suffix=""):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.1f}{suffix}"
+    return f"{value}{suffix}"
+
+
+class Command(BaseCommand):
+    help = "Reports the cache footprint and effectiveness of every registered cached serializer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sample", type=int, default=None,
+                            help="probe a random sample of this many rows per serializer instead of all of them")
+        parser.add_argument("--top", type=int, default=5, help="how many of the biggest entries to list")
+        add_serializer_arguments(parser)
+
+    def handle(self, *args, **options):
+        for serializer_class in get_selected_serializers(options):
+            self._report(serializer_class, options["sample"], options["top"])
+
+    def _report(self, serializer_class, sample, top):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"{serializer_class.__module__}.{serializer_class.__qualname__}"))
+        stats = collect_serializer_stats(serializer_class, sample=sample, top=top)
+        if stats is None:
+            self.stdout.write("  not bound to a model, keys can't be enumerated")
+            return
+
+        adapter = get_cache_adapter(serializer_class.get_cache())
+        sizes = stats.size_distribution()
+        cached_share = None if stats.cached_share is None else stats.cached_share * 100
+        self.stdout.write(f"  backend:             {type(serializer_class.get_cache()).__name__} "
+                          f"({type(adapter).__name__})")
+        self.stdout.write(f"  keys:                {stats.key_count} of {stats.probed} probed rows")
+        self.stdout.write(f"  cached share:        {_fmt(cached_share, '%')}")
+        self.stdout.write(f"  total size:          {stats.total_size} bytes")
+        self.stdout.write("  size (bytes):        " + " ".join(f"{name}={_fmt(value)}" for name, value in sizes.items()))
+        if stats.reports_ttl:
+            ttls = stats.ttl_distribution()
+            self.stdout.write("  ttl remaining (s):   " + " ".join(f"{name}={_fmt(value)}" for name, value in ttls.items())
+                              + f" never={stats.never_expire}")
+        else:
+            self.stdout.write("  ttl remaining (s):   not reported by this backend")
+        if stats.biggest:
+            self.stdout.write("  biggest entries:")
+            for size, key in stats.biggest:
+                self.stdout.write(f"    {size:>10}  {key}")
@@ -0,0 +1,34 @@
+from importlib import import_module
+from typing import List, Type
+
+from django.core.management.base import CommandError
+from django.urls import get_resolver
+
+from cachelizer.cache_serializer import _CashedSerializerBase, get_registered_serializers
+
+
+def add_serializer_arguments(parser):
+    parser.add_argument("--serializer", action="append", default=[],
+                        help="only serializers whose name (or dotted path) matches, can be repeated")
+    parser.add_argument("--module", action="append", default=[],
+                        help="extra module to import so its serializers get registered, can be repeated")
+
+
+def load_serializers(modules: List[str]):
+    # serializers register themselves when their module is imported,
+    # loading the url conf pulls in the views and with them the serializers they use
+    get_resolver().url_patterns
+    for module in modules:
+        import_module(module)
+
+
+def get_selected_serializers(options) -> List[Type[_CashedSerializerBase]]:
+    load_serializers(options["module"])
+    serializer_classes = get_registered_serializers()
+    if options["serializer"]:
+        wanted = set(options["serializer"])
+        serializer_classes = [cls for cls in serializer_classes
+                              if cls.__name__ in wanted or f"{cls.__module__}.{cls.__qualname__}" in wanted]
+        if not serializer_classes:
+            raise CommandError(f"no registered serializer matches {', '.join(sorted(wanted))}")
+    return serializer_classes
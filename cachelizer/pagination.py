@@ -0,0 +1,169 @@
+import hashlib
+from functools import partial
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
+
+from cachelizer.cache_serializer import _CashedSerializerBase, LookedUpList
+from cachelizer.generations import get_model_generation
+
+
+class _QuerysetCache:
+    """
+    caches the count and the page pk lists of a queryset, keyed on the queryset's sql (the filter fingerprint)
+    and the generation of its model, so they go stale as soon as a row of the model is written.
+    writes to other models the queryset filters on are not tracked, `timeout` bounds how stale that gets.
+    """
+
+    def __init__(self, queryset: QuerySet, cache: BaseCache, timeout: int):
+        self.queryset = queryset
+        self.cache = cache
+        self.timeout = timeout
+
+    @cached_property
+    def _key_prefix(self) -> str:
+        try:
+            sql, params = self.queryset.query.sql_with_params()
+        except EmptyResultSet:
+            sql, params = "", ()
+        fingerprint = hashlib.md5(f"{self.queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+        model = self.queryset.model
+        return f"cachelizer_qs_{model._meta.label_lower}_{get_model_generation(model)}_{fingerprint}"
+
+    def _get_or_set(self, key: str, compute: Callable):
+        key = f"{self._key_prefix}_{key}"
+        value = self.cache.get(key)
+        if value is None:
+            value = compute()
+            self.cache.set(key, value, self.timeout)
+        return value
+
+    def count(self) -> int:
+        return self._get_or_set("count", self.queryset.count)
+
+    def page_pks(self, bottom: int, top: int) -> List:
+        return self._get_or_set(f"pks_{bottom}_{top}",
+                                lambda: list(self.queryset[bottom:top].values_list("pk", flat=True)))
+
+
+def _get_view_serializer(view) -> Optional[_CashedSerializerBase]:
+    get_serializer = getattr(view, "get_serializer", None)
+    if get_serializer is None:
+        return None
+    serializer = get_serializer()
+    if isinstance(serializer, _CashedSerializerBase) and hasattr(serializer, "_get_cache_key_for_pk"):
+        return serializer
+    return None
+
+
+def load_page_objects(queryset: QuerySet, pks: List, serializer: Optional[_CashedSerializerBase] = None) -> List:
+    """
+    turns a page of pks into the objects to serialize. rows whose representation is cached by `serializer`
+    are not queried, they are returned as instances with every field but the pk deferred (django loads
+    a field on access, so the page stays correct even if the entry expires before it is rendered).
+    the remaining rows are loaded with a single query. the cache entries found are returned along with the
+    objects (a `LookedUpList`), so rendering the page with the serializer doesn't fetch them again.
+    """
+    keys, found = {}, {}
+    if serializer is not None and serializer._get_do_use_cache():
+        keys = {pk: serializer._get_cache_key_for_pk(pk) for pk in pks}
+        found = serializer.get_cache().get_many(keys.values(), version=serializer._cache_version)
+    cached_pks = {pk for pk, key in keys.items() if key in found}
+    missing = [pk for pk in pks if pk not in cached_pks]
+    loaded = queryset.in_bulk(missing) if missing else {}
+
+    model = queryset.model
+    objects = []
+    for pk in pks:
+        if pk in cached_pks:
+            objects.append(model.from_db(queryset.db, [model._meta.pk.attname], [pk]))
+        elif pk in loaded:
+            objects.append(loaded[pk])
+    return LookedUpList(objects, keys.values(), found)
+
+
+class CachedPaginator(Paginator):
+    """
+    django paginator that caches the count and the pk list of each page, see `_QuerysetCache`
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 serializer: Optional[_CashedSerializerBase] = None, cache: Optional[BaseCache] = None,
+                 cache_timeout: int = 60 * 5):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.serializer = serializer
+        self._queryset_cache = None
+        if isinstance(object_list, QuerySet):
+            cache = cache or (serializer.get_cache() if serializer is not None
+                              else caches[settings.CACHELIZER_DEFAULT_CACHE])
+            self._queryset_cache = _QuerysetCache(object_list, cache, cache_timeout)
+
+    @cached_property
+    def count(self):
+        if self._queryset_cache is None:
+            return super().count
+        return self._queryset_cache.count()
+
+    def page(self, number):
+        if self._queryset_cache is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        pks = self._queryset_cache.page_pks(bottom, top)
+        return self._get_page(load_page_objects(self.object_list, pks, self.serializer), number, self)
+
+
+class CachedPageNumberPagination(PageNumberPagination):
+    """
+    `PageNumberPagination` with a cached count and cached page pk lists. with the items cached by the
+    view's serializer too, a warm page is served without any sql.
+    """
+    cache_timeout = 60 * 5
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(CachedPaginator, serializer=_get_view_serializer(view),
+                                              cache_timeout=self.cache_timeout)
+        objects = super().paginate_queryset(queryset, request, view)
+        if objects is not None and isinstance(self.page.object_list, LookedUpList):
+            # keep the entries looked up by the paginator, `super()` copies the page into a plain list
+            return self.page.object_list
+        return objects
+
+
+class CachedLimitOffsetPagination(LimitOffsetPagination):
+    """
+    `LimitOffsetPagination` with a cached count and cached page pk lists, see `CachedPageNumberPagination`
+    """
+    cache_timeout = 60 * 5
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not isinstance(queryset, QuerySet):
+            return super().paginate_queryset(queryset, request, view)
+        serializer = _get_view_serializer(view)
+        cache = serializer.get_cache() if serializer is not None else caches[settings.CACHELIZER_DEFAULT_CACHE]
+        queryset_cache = _QuerysetCache(queryset, cache, self.cache_timeout)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = queryset_cache.count()
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        pks = queryset_cache.page_pks(self.offset, self.offset + self.limit)
+        return load_page_objects(queryset, pks, serializer)
@@ -0,0 +1,229 @@
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Type
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Model
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils.module_loading import import_string
+
+from cachelizer.cache_serializer import _CashedSerializerBase, get_registered_serializers
+
+logger = logging.getLogger(__name__)
+
+# only plain values, so events can go through a multiprocessing queue
+RecomputeEvent = namedtuple("RecomputeEvent", ("serializer", "pk"))
+
+
+def _serializer_path(serializer_class: Type[_CashedSerializerBase]) -> str:
+    return f"{serializer_class.__module__}.{serializer_class.__qualname__}"
+
+
+class QueueBroker:
+    """
+    hands events from the producers (model signals) to the consumer of a `RecomputeQueue`.
+    by default it is an in process `queue.Queue`, pass a `multiprocessing.Queue` (or a manager queue)
+    to share one stream of events between processes. any broker with `publish` and `consume` will do.
+    """
+
+    def __init__(self, queue_=None):
+        self._queue = queue_ if queue_ is not None else queue.Queue()
+
+    def publish(self, event: RecomputeEvent):
+        self._queue.put(event)
+
+    def consume(self, timeout: Optional[float] = None) -> Optional[RecomputeEvent]:
+        try:
+            if timeout == 0:
+                return self._queue.get_nowait()
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RecomputeQueue:
+    """
+    recomputes the cached representations of changed rows in the background instead of invalidating them.
+    events for the same (serializer, pk) that arrive within `window` seconds of the first one are coalesced
+    into a single recompute, so a row saved many times per second is rendered once per window. due rows are
+    rendered in batches of up to `batch_size` per serializer (one query each) by a pool of `workers` threads
+    and written with `set_many`. until then the previous representation keeps being served.
+    """
+
+    def __init__(self, broker=None, window: float = 0.5, batch_size: int = 100, workers: int = 2):
+        self.broker = broker or QueueBroker()
+        self.window = window
+        self.batch_size = batch_size
+        self.workers = workers
+        self._pending: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._executor = None
+        self._stopping = threading.Event()
+
+    def enqueue(self, serializer_class: Type[_CashedSerializerBase], pk):
+        self.broker.publish(RecomputeEvent(_serializer_path(serializer_class), pk))
+        if self._thread is None and getattr(settings, "CACHELIZER_RECOMPUTE", {}).get("AUTOSTART", True):
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cachelizer-recompute")
+            self._thread = threading.Thread(target=self._run, name="cachelizer-recompute-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, flush=True):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join()
+        if flush:
+            self._dispatch(force=True)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            event = self.broker.consume(timeout=self._next_timeout())
+            if event is not None:
+                self._add(event)
+            self._dispatch()
+
+    def _next_timeout(self) -> float:
+        with self._lock:
+            if not self._pending:
+                return self.window
+            return max(0.0, min(self._pending.values()) - time.monotonic())
+
+    def _add(self, event: RecomputeEvent):
+        with self._lock:
+            # the deadline is set by the first event, later ones only join it
+            self._pending.setdefault((event.serializer, event.pk), time.monotonic() + self.window)
+
+    def _pop_due(self, force=False) -> Dict[str, List]:
+        now = time.monotonic()
+        due: Dict[str, List] = {}
+        with self._lock:
+            for (serializer, pk), deadline in list(self._pending.items()):
+                if force or deadline <= now:
+                    del self._pending[(serializer, pk)]
+                    due.setdefault(serializer, []).append(pk)
+        return due
+
+    def _dispatch(self, force=False):
+        for serializer, pks in self._pop_due(force).items():
+            for i in range(0, len(pks), self.batch_size):
+                batch = pks[i:i + self.batch_size]
+                if self._executor is not None:
+                    self._executor.submit(self._recompute_in_thread, serializer, batch)
+                else:
+                    self.recompute(import_string(serializer), batch)
+
+    def run_pending(self, force=True):
+        """
+        synchronously consumes every published event and recomputes the due rows (all of them when `force`)
+        in the calling thread, for tests and for driving the queue without the background threads.
+        """
+        while True:
+            event = self.broker.consume(timeout=0)
+            if event is None:
+                break
+            self._add(event)
+        for serializer, pks in self._pop_due(force).items():
+            for i in range(0, len(pks), self.batch_size):
+                self.recompute(import_string(serializer), pks[i:i + self.batch_size])
+
+    def _recompute_in_thread(self, serializer: str, pks: List):
+        close_old_connections()
+        try:
+            self.recompute(import_string(serializer), pks)
+        except Exception:
+            logger.exception("failed recomputing %s for %s", serializer, pks)
+        finally:
+            close_old_connections()
+
+    @staticmethod
+    def recompute(serializer_class: Type[_CashedSerializerBase], pks: List):
+        serializer = serializer_class(use_cache=False)
+        instances = serializer_class._get_model()._default_manager.filter(pk__in=pks)
+        data = {serializer._get_cache_key(instance): serializer.to_representation(instance) for instance in instances}
+        cache = serializer_class.get_cache()
+        # rows deleted in the meantime
+        gone = set(map(serializer._get_cache_key_for_pk, pks)) - set(data)
+        if gone:
+            cache.delete_many(gone, version=serializer_class._cache_version)
+        if data:
+            cache.set_many(data, serializer_class._cache_timeout, version=serializer_class._cache_version)
+
+
+_recompute_queue: Optional[RecomputeQueue] = None
+
+
+def get_recompute_queue() -> RecomputeQueue:
+    """
+    the process wide queue, configured by the `CACHELIZER_RECOMPUTE` setting
+    (WINDOW, BATCH_SIZE, WORKERS, BROKER - a class path or a broker instance, AUTOSTART)
+    """
+    global _recompute_queue
+    if _recompute_queue is None:
+        config = getattr(settings, "CACHELIZER_RECOMPUTE", {})
+        broker = config.get("BROKER")
+        if isinstance(broker, str):
+            broker = import_string(broker)()
+        _recompute_queue = RecomputeQueue(broker, window=config.get("WINDOW", 0.5),
+                                          batch_size=config.get("BATCH_SIZE", 100), workers=config.get("WORKERS", 2))
+    return _recompute_queue
+
+
+def _get_recomputed_serializers(model: Type[Model]) -> List[Type[_CashedSerializerBase]]:
+    # model serializers opt in with `Meta.cache_recompute = True` (the others can't be looked up by pk),
+    # context dependent ones (or ones nesting a context dependent serializer) can't be recomputed
+    return [serializer_class for serializer_class in get_registered_serializers()
+            if getattr(serializer_class.Meta, "cache_recompute", False)
+            and hasattr(serializer_class, "_get_cache_key_for_pk")
+            and not serializer_class._get_vary_on()
+            and getattr(serializer_class.Meta, "model", None) is model]
+
+
+def _enqueue(model: Type[Model], pks, using: str):
+    serializer_classes = _get_recomputed_serializers(model)
+    if not serializer_classes:
+        return
+    pks = list(pks)
+
+    def publish():
+        recompute_queue = get_recompute_queue()
+        for serializer_class in serializer_classes:
+            for pk in pks:
+                recompute_queue.enqueue(serializer_class, pk)
+
+    # only once the write is committed, a worker reading the row before that would cache the old one
+    transaction.on_commit(publish, using=using)
+
+
+def _on_save_or_delete(sender, instance, using, **kwargs):
+    _enqueue(sender, [instance.pk], using)
+
+
+def _on_m2m_changed(sender, instance, action, model, pk_set, using, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    _enqueue(type(instance), [instance.pk], using)
+    if pk_set:
+        _enqueue(model, pk_set, using)
+
+
+def connect_signals():
+    post_save.connect(_on_save_or_delete, dispatch_uid="cachelizer_recompute_post_save")
+    post_delete.connect(_on_save_or_delete, dispatch_uid="cachelizer_recompute_post_delete")
+    m2m_changed.connect(_on_m2m_changed, dispatch_uid="cachelizer_recompute_m2m_changed")
@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta
+from cachelizer.models import Person, Group, Dog
+
+
+class DogSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+    class Meta:
+        model = Dog
+        fields = ("id", "name",)
+
+
+class PersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    pet = DogSerializer(read_only=True)
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "last_name", "pet",)
+
+
+class GroupSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    people = PersonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Group
+        fields = ("id", "name", "people",)
@@ -0,0 +1,312 @@
+import hashlib
+import pickle
+import random
+import threading
+import time
+from bisect import bisect
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+from cachelizer.stats import get_cache_adapter
+
+_executor = None
+_executor_lock = threading.Lock()
+_hot_key_trackers: Dict[tuple, "HotKeyTracker"] = {}
+# the time left of an entry read from a backend that doesn't report it, such entries aren't replicated on read
+_UNKNOWN_TTL = object()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    # shared by every `ShardedCache`, django creates a cache instance per thread
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cachelizer-shard")
+        return _executor
+
+
+def _get_hot_key_tracker(nodes: List[str], threshold: int, window: float) -> "HotKeyTracker":
+    # django creates a cache instance per thread, the read counts have to be shared between them
+    with _executor_lock:
+        return _hot_key_trackers.setdefault((tuple(nodes), threshold, window), HotKeyTracker(threshold, window))
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    consistent hash ring, adding or removing a node only moves the keys of that node
+    """
+
+    def __init__(self, nodes: Iterable[str], virtual_nodes: int = 100):
+        self.nodes = list(dict.fromkeys(nodes))
+        ring = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(virtual_nodes))
+        self._hashes = [node_hash for node_hash, _ in ring]
+        self._ring_nodes = [node for _, node in ring]
+
+    def get_nodes(self, key: str, count: int = 1) -> List[str]:
+        """
+        returns up to `count` distinct nodes for the key, the first one is the key's primary node
+        """
+        count = min(count, len(self.nodes))
+        nodes = []
+        index = bisect(self._hashes, _hash(key))
+        for i in range(len(self._ring_nodes)):
+            node = self._ring_nodes[(index + i) % len(self._ring_nodes)]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == count:
+                    break
+        return nodes
+
+
+class HotKeyTracker:
+    """
+    counts reads per key in fixed time windows, a key read `threshold` times within a window is hot
+    for the rest of that window and the whole next one.
+    """
+
+    def __init__(self, threshold: int, window: float):
+        self.threshold = threshold
+        self.window = window
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._counts = Counter()
+        self._hot = set()
+        self._previous_hot = set()
+        # the (key, version) copies this process wrote to replica shards, with the time they expire by
+        self._replicated: Dict[tuple, float] = {}
+
+    def _roll(self):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._previous_hot = self._hot
+            self._hot = set()
+            self._counts.clear()
+            self._window_start = now
+            self._replicated = {key: expires for key, expires in self._replicated.items() if expires > now}
+
+    def record_read(self, key: str) -> bool:
+        with self._lock:
+            self._roll()
+            self._counts[key] += 1
+            if self._counts[key] >= self.threshold:
+                self._hot.add(key)
+            return key in self._hot or key in self._previous_hot
+
+    def is_hot(self, key: str) -> bool:
+        with self._lock:
+            self._roll()
+            return key in self._hot or key in self._previous_hot
+
+    def add_replicated(self, keys: Iterable[str], version, timeout: float):
+        expires = time.monotonic() + timeout
+        with self._lock:
+            for key in keys:
+                self._replicated[(key, version)] = max(expires, self._replicated.get((key, version), 0))
+
+    def is_replicated(self, key: str, version) -> bool:
+        with self._lock:
+            return self._replicated.get((key, version), 0) > time.monotonic()
+
+
+class ShardedCache(BaseCache):
+    """
+    a cache backend spreading keys over other `settings.CACHES` aliases with consistent hashing::
+
+        CACHES = {
+            "shard_1": {...}, "shard_2": {...}, "shard_3": {...},
+            "sharded": {
+                "BACKEND": "cachelizer.sharding.ShardedCache",
+                "LOCATION": ["shard_1", "shard_2", "shard_3"],
+                "OPTIONS": {"HOT_KEY_REPLICAS": 1},
+            },
+        }
+        CACHELIZER_DEFAULT_CACHE = "sharded"
+
+    batched calls are split per shard and the shards are called in parallel. keys read more than
+    `HOT_KEY_THRESHOLD` times within `HOT_KEY_WINDOW` seconds are copied to `HOT_KEY_REPLICAS` more
+    shards (with `HOT_KEY_TIMEOUT`, or less when the entry has less time left) and their reads are spread
+    over all copies. hotness is tracked per process: `delete` always goes to every shard a key could be
+    replicated to, but a `set` of a key that isn't hot here only drops the copies this process made, so it
+    doesn't double the write traffic. copies made by other processes can then be read stale for up to
+    `HOT_KEY_TIMEOUT`, set `SYNC_ALL_REPLICAS` to drop them on every write instead.
+    keys are passed to the shards as is, the shards' own KEY_PREFIX / VERSION / KEY_FUNCTION apply.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        if isinstance(location, str):
+            location = [alias.strip() for alias in location.split(",")]
+        self._ring = HashRing(location, options.get("VIRTUAL_NODES", 100))
+        self._replicas = min(options.get("HOT_KEY_REPLICAS", 0), len(self._ring.nodes) - 1)
+        self._hot_key_timeout = options.get("HOT_KEY_TIMEOUT", 60)
+        self._hot_keys = _get_hot_key_tracker(self._ring.nodes, options.get("HOT_KEY_THRESHOLD", 100),
+                                              options.get("HOT_KEY_WINDOW", 10))
+        self._sync_all_replicas = options.get("SYNC_ALL_REPLICAS", False)
+        self._max_workers = options.get("MAX_WORKERS", 2 * len(self._ring.nodes))
+
+    @property
+    def shard_aliases(self) -> List[str]:
+        return self._ring.nodes
+
+    def get_shard_aliases(self, key: str) -> List[str]:
+        """
+        the aliases that may hold the key, its primary shard first and then its hot key replicas
+        """
+        return self._ring.get_nodes(key, 1 + self._replicas)
+
+    def _primary(self, key: str) -> BaseCache:
+        return caches[self._ring.get_nodes(key)[0]]
+
+    def _run_per_shard(self, groups: Dict[str, list], call: Callable[[BaseCache, list], object]) -> Dict[str, object]:
+        if len(groups) <= 1:
+            return {alias: call(caches[alias], items) for alias, items in groups.items()}
+        executor = _get_executor(self._max_workers)
+        # `caches` is thread local, resolve the alias inside the worker thread
+        futures = {alias: executor.submit(lambda a, i: call(caches[a], i), alias, items)
+                   for alias, items in groups.items()}
+        return {alias: future.result() for alias, future in futures.items()}
+
+    def _replicate(self, data: Dict[str, object], timeout, version):
+        hot_timeout = self._hot_key_timeout if timeout is None or timeout is DEFAULT_TIMEOUT \
+            else min(timeout, self._hot_key_timeout)
+        groups: Dict[str, dict] = {}
+        for key, value in data.items():
+            for alias in self.get_shard_aliases(key)[1:]:
+                groups.setdefault(alias, {})[key] = value
+        self._hot_keys.add_replicated(data, version, hot_timeout)
+        self._run_per_shard(groups, lambda cache, items: cache.set_many(items, hot_timeout, version=version))
+
+    def _sync_replicas(self, data: Dict[str, object], timeout, version):
+        # copies of keys that aren't hot (anymore) are dropped rather than left stale, see the class docstring
+        if not self._replicas:
+            return
+        hot = {key: value for key, value in data.items() if self._hot_keys.is_hot(key)}
+        self._replicate(hot, timeout, version)
+        self._delete_many([key for key in data if key not in hot
+                           and (self._sync_all_replicas or self._hot_keys.is_replicated(key, version))],
+                          version, replicas_only=True)
+
+    def _recover(self, cache: BaseCache, keys: List[str], version) -> Dict[str, tuple]:
+        """
+        reads keys from their primary shard, as {key: (value, seconds left)}, None when the entry never expires
+        and `_UNKNOWN_TTL` for backends whose stats adapter doesn't report expiry times.
+        """
+        adapter = get_cache_adapter(cache)
+        if not adapter.reports_ttl:
+            return {key: (value, _UNKNOWN_TTL) for key, value in cache.get_many(keys, version=version).items()}
+        now = time.time()
+        return {entry.key: (pickle.loads(entry.raw), None if entry.expires_at is None else entry.expires_at - now)
+                for entry in adapter.probe(keys, version=version)}
+
+    def _read_alias(self, key: str) -> str:
+        aliases = self.get_shard_aliases(key)
+        if self._replicas and self._hot_keys.record_read(key):
+            return random.choice(aliases)
+        return aliases[0]
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        groups: Dict[str, List[str]] = {}
+        for key in keys:
+            groups.setdefault(self._read_alias(key), []).append(key)
+        found = {}
+        for result in self._run_per_shard(groups, lambda cache, items: cache.get_many(items, version=version)).values():
+            found.update(result)
+
+        # hot keys read from a replica that doesn't have them yet fall back to their primary shard
+        retry: Dict[str, List[str]] = {}
+        for alias, keys in groups.items():
+            for key in keys:
+                primary = self.get_shard_aliases(key)[0]
+                if key not in found and alias != primary:
+                    retry.setdefault(primary, []).append(key)
+        if retry:
+            # the copies get the primary entry's time left at most, so they can't outlive it
+            by_timeout: Dict[object, dict] = {}
+            results = self._run_per_shard(retry, lambda cache, items: self._recover(cache, items, version))
+            for result in results.values():
+                for key, (value, ttl) in result.items():
+                    found[key] = value
+                    if ttl is None:
+                        by_timeout.setdefault(None, {})[key] = value
+                    elif ttl is not _UNKNOWN_TTL and ttl >= 1:
+                        by_timeout.setdefault(min(int(ttl), self._hot_key_timeout), {})[key] = value
+            for timeout, data in by_timeout.items():
+                self._replicate(data, timeout, version)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        groups: Dict[str, dict] = {}
+        for key, value in data.items():
+            groups.setdefault(self.get_shard_aliases(key)[0], {})[key] = value
+        failed = []
+        for result in self._run_per_shard(
+                groups, lambda cache, items: cache.set_many(items, timeout, version=version)).values():
+            failed.extend(result or ())
+        self._sync_replicas(data, timeout, version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._primary(key).add(key, value, timeout, version=version)
+        if added:
+            self._sync_replicas({key: value}, timeout, version)
+        return added
+
+    def delete(self, key, version=None):
+        return any(self._delete_many([key], version).values())
+
+    def delete_many(self, keys, version=None):
+        self._delete_many(keys, version)
+
+    def _delete_many(self, keys, version=None, replicas_only=False):
+        groups: Dict[str, List[str]] = {}
+        for key in keys:
+            for alias in self.get_shard_aliases(key)[1 if replicas_only else 0:]:
+                groups.setdefault(alias, []).append(key)
+
+        def delete(cache, items):
+            if len(items) == 1:
+                return cache.delete(items[0], version=version)
+            cache.delete_many(items, version=version)
+            return True
+
+        return self._run_per_shard(groups, delete)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        touched = self._primary(key).touch(key, timeout, version=version)
+        for alias in self.get_shard_aliases(key)[1:]:
+            caches[alias].touch(key, timeout, version=version)
+        return touched
+
+    def incr(self, key, delta=1, version=None):
+        value = self._primary(key).incr(key, delta, version=version)
+        if self._replicas:
+            self._delete_many([key], version, replicas_only=True)
+        return value
+
+    def decr(self, key, delta=1, version=None):
+        return self.incr(key, -delta, version=version)
+
+    def has_key(self, key, version=None):
+        return key in self.get_many([key], version=version)
+
+    def clear(self):
+        self._run_per_shard({alias: None for alias in self._ring.nodes}, lambda cache, _: cache.clear())
+
+    def close(self, **kwargs):
+        for alias in self._ring.nodes:
+            caches[alias].close(**kwargs)
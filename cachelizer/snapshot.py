@@ -0,0 +1,207 @@
+import json
+import pickle
+import struct
+import time
+from collections import namedtuple
+from typing import BinaryIO, Dict, Iterable, List, Optional, Type
+
+from django.apps import apps
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from cachelizer.cache_serializer import _CashedSerializerBase, get_registered_serializers
+from cachelizer.generations import get_model_generation, peek_model_generation
+from cachelizer.stats import get_cache_adapter, _iter_sample_pks
+
+# a snapshot is the magic and the format version followed by records of a type byte, a payload length and the
+# payload: a json header per serializer ("S"), the entries of that serializer ("E") and an end marker ("Z").
+# an entry is its expiry timestamp (0 for never), the length of its key, the key and the pickled payload
+# exactly as the backend stored it (see `stats.CacheEntry.raw`).
+MAGIC = b"CACHELIZER-SNAPSHOT"
+FORMAT_VERSION = 1
+_RECORD = struct.Struct(">cI")
+_ENTRY = struct.Struct(">dH")
+
+LoadedSection = namedtuple("LoadedSection", ("serializer", "loaded", "skipped", "reason"))
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _serializer_path(serializer_class: Type[_CashedSerializerBase]) -> str:
+    return f"{serializer_class.__module__}.{serializer_class.__qualname__}"
+
+
+def _get_serializer_models(serializer_class: Type[_CashedSerializerBase]) -> List:
+    """
+    the models of the serializer and of every serializer nested in it, a cached representation goes stale
+    when any of them is written
+    """
+    models = []
+
+    def walk(serializer):
+        model = getattr(getattr(serializer, "Meta", None), "model", None)
+        if model is not None and model not in models:
+            models.append(model)
+        for field in serializer.fields.values():
+            if isinstance(field, ListSerializer):
+                field = field.child
+            if isinstance(field, BaseSerializer) and hasattr(field, "fields"):
+                walk(field)
+
+    walk(serializer_class(use_cache=False))
+    return models
+
+
+def _write_record(file: BinaryIO, record_type: bytes, payload: bytes):
+    file.write(_RECORD.pack(record_type, len(payload)))
+    file.write(payload)
+
+
+def _read_exactly(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise SnapshotError("truncated snapshot")
+    return data
+
+
+def dump_snapshot(file: BinaryIO, serializer_classes: Iterable[Type[_CashedSerializerBase]],
+                  sample: Optional[int] = None) -> Dict[str, int]:
+    """
+    writes the cached representations of the serializers' model rows (all of them, or a random `sample` per
+    serializer) to the binary file, entry by entry as they are read from the cache. only the variant shared
+    by every context is dumped for `cache_vary_on` serializers, serializers that are not bound to a model are
+    left out. returns the number of entries written per serializer path.
+    """
+    file.write(MAGIC + bytes((FORMAT_VERSION,)))
+    counts = {}
+    for serializer_class in serializer_classes:
+        if not hasattr(serializer_class, "_generate_cache_key_for_pk"):
+            continue
+        path = _serializer_path(serializer_class)
+        # read before the entries, a write while dumping leaves the snapshot behind and its entries are skipped
+        adapter = get_cache_adapter(serializer_class.get_cache())
+        generations = {model._meta.label_lower: get_model_generation(model)
+                       for model in _get_serializer_models(serializer_class)}
+        header = {
+            "serializer": path,
+            "fingerprint": serializer_class._get_schema_fingerprint(),
+            "cache_version": serializer_class._cache_version,
+            "generations": generations,
+            # entries without an expiry never expire, unless the backend can't tell
+            "reports_ttl": adapter.reports_ttl,
+        }
+        _write_record(file, b"S", json.dumps(header).encode())
+
+        keys = (serializer_class._generate_cache_key_for_pk(pk)
+                for pk in _iter_sample_pks(serializer_class._get_model(), sample))
+        counts[path] = 0
+        for entry in adapter.probe(keys, version=serializer_class._cache_version):
+            key = entry.key.encode()
+            _write_record(file, b"E", _ENTRY.pack(entry.expires_at or 0, len(key)) + key + entry.raw)
+            counts[path] += 1
+    _write_record(file, b"Z", b"")
+    return counts
+
+
+def _check_section(header: Dict, serializer_classes: Dict[str, Type[_CashedSerializerBase]],
+                   force: bool) -> Optional[str]:
+    serializer_class = serializer_classes.get(header["serializer"])
+    if serializer_class is None:
+        return "unknown serializer"
+    if serializer_class._get_schema_fingerprint() != header["fingerprint"]:
+        return "serializer changed"
+    if serializer_class._cache_version != header["cache_version"]:
+        return "cache version changed"
+    for label, generation in header["generations"].items():
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            return f"unknown model {label}"
+        current = peek_model_generation(model)
+        if current is None:
+            if not force:
+                return f"{label} generation unknown"
+        elif current != generation:
+            return f"{label} changed"
+    return None
+
+
+def _bucket_timeout(remaining: float) -> int:
+    # rounded down to 4 significant bits, so the entries of a batch share a few timeouts (and `set_many` calls).
+    # an entry may expire up to 1/8 of its remaining time early, never later than it would have
+    seconds = int(remaining)
+    shift = max(0, seconds.bit_length() - 4)
+    return seconds >> shift << shift
+
+
+def load_snapshot(file: BinaryIO, batch_size: int = 500, force: bool = False) -> List[LoadedSection]:
+    """
+    loads a snapshot written by `dump_snapshot` into the caches the serializers use now (any backend), with
+    batched `set_many` calls of up to `batch_size` entries. the entries of a serializer are skipped when its
+    definition or `cache_version` changed, or when a model it renders was written since the snapshot. a model
+    whose generation counter is gone from the cache (e.g. a fresh node) can't be verified and is skipped too,
+    unless `force` (for when you know the rows didn't change). entries that expired in the meantime are
+    skipped, the others keep (about) the time they had left, see `_bucket_timeout`.
+    serializers are looked up by path among the registered ones, import their modules first.
+    """
+    if _read_exactly(file, len(MAGIC)) != MAGIC:
+        raise SnapshotError("not a cachelizer snapshot")
+    version = _read_exactly(file, 1)[0]
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"unsupported snapshot format version {version}")
+
+    serializer_classes = {_serializer_path(cls): cls for cls in get_registered_serializers()}
+    sections = []
+    serializer_class = None
+    # entries to store, grouped by timeout
+    batch: Dict[Optional[int], Dict] = {}
+    batch_length = loaded = skipped = 0
+    header = reason = None
+
+    def flush():
+        nonlocal batch_length
+        for timeout, data in batch.items():
+            serializer_class.get_cache().set_many(data, timeout, version=serializer_class._cache_version)
+        batch.clear()
+        batch_length = 0
+
+    def close_section():
+        if header is not None:
+            flush()
+            sections.append(LoadedSection(header["serializer"], loaded, skipped, reason))
+
+    now = time.time()
+    while True:
+        record_type, length = _RECORD.unpack(_read_exactly(file, _RECORD.size))
+        payload = _read_exactly(file, length)
+        if record_type == b"S":
+            close_section()
+            header = json.loads(payload)
+            reason = _check_section(header, serializer_classes, force)
+            serializer_class = serializer_classes.get(header["serializer"]) if reason is None else None
+            loaded = skipped = 0
+        elif record_type == b"E":
+            if header is None:
+                raise SnapshotError("entry outside of a serializer section")
+            expires_at, key_length = _ENTRY.unpack_from(payload)
+            if serializer_class is None or (expires_at and expires_at - now < 1):
+                skipped += 1
+                continue
+            if expires_at:
+                timeout = _bucket_timeout(expires_at - now)
+            elif header.get("reports_ttl", True):
+                timeout = None
+            else:
+                timeout = serializer_class._cache_timeout
+            key = payload[_ENTRY.size:_ENTRY.size + key_length].decode()
+            batch.setdefault(timeout, {})[key] = pickle.loads(payload[_ENTRY.size + key_length:])
+            batch_length += 1
+            loaded += 1
+            if batch_length >= batch_size:
+                flush()
+        elif record_type == b"Z":
+            close_section()
+            return sections
+        else:
+            raise SnapshotError(f"unknown record type {record_type!r}")
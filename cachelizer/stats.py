@@ -0,0 +1,282 @@
+import base64
+import heapq
+import pickle
+import time
+import zlib
+from abc import abstractmethod
+from collections import namedtuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Type
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.db import connections, models, router
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from cachelizer.cache_serializer import _CashedSerializerBase
+
+# `raw` holds the pickled payload exactly as the backend stores it (after undoing the backend's own
+# transport encoding, i.e. zlib for the file based cache and base64 for the database cache).
+# `expires_at` is a unix timestamp, None means the entry never expires.
+CacheEntry = namedtuple("CacheEntry", ("key", "raw", "expires_at"))
+
+
+class BaseCacheAdapter:
+    """
+    looks up stored entries of a cache backend without going through its regular `get` path,
+    so the stats command can see the payload size and the expiry of every entry.
+    """
+    # False when the backend does not expose expiry times, `expires_at` is then always None
+    reports_ttl = True
+
+    def __init__(self, cache: BaseCache):
+        self.cache = cache
+
+    @abstractmethod
+    def probe(self, keys: Iterable[str], version=None) -> Iterator[CacheEntry]:
+        pass
+
+
+class LocMemCacheAdapter(BaseCacheAdapter):
+
+    def probe(self, keys, version=None):
+        now = time.time()
+        for key in keys:
+            made_key = self.cache.make_key(key, version)
+            with self.cache._lock:
+                raw = self.cache._cache.get(made_key)
+                expires_at = self.cache._expire_info.get(made_key)
+            if raw is None or (expires_at is not None and expires_at <= now):
+                continue
+            yield CacheEntry(key, raw, expires_at)
+
+
+class FileBasedCacheAdapter(BaseCacheAdapter):
+
+    def probe(self, keys, version=None):
+        now = time.time()
+        for key in keys:
+            fname = self.cache._key_to_file(key, version)
+            try:
+                with open(fname, "rb") as f:
+                    try:
+                        expires_at = pickle.load(f)
+                    except EOFError:
+                        continue
+                    if expires_at is not None and expires_at < now:
+                        continue
+                    raw = zlib.decompress(f.read())
+            except (FileNotFoundError, zlib.error):
+                continue
+            yield CacheEntry(key, raw, expires_at)
+
+
+class DatabaseCacheAdapter(BaseCacheAdapter):
+    batch_size = 500
+
+    def probe(self, keys, version=None):
+        keys = iter(keys)
+        while True:
+            batch = list(islice(keys, self.batch_size))
+            if not batch:
+                return
+            yield from self._probe_batch(batch, version)
+
+    def _probe_batch(self, keys: List[str], version=None) -> Iterator[CacheEntry]:
+        key_map = {self.cache.make_key(key, version): key for key in keys}
+        connection = connections[router.db_for_read(self.cache.cache_model_class)]
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT %s, %s, %s FROM %s WHERE %s IN (%s)' % (
+                    quote_name('cache_key'),
+                    quote_name('value'),
+                    quote_name('expires'),
+                    quote_name(self.cache._table),
+                    quote_name('cache_key'),
+                    ', '.join(['%s'] * len(key_map)),
+                ),
+                list(key_map),
+            )
+            rows = cursor.fetchall()
+
+        expression = models.Expression(output_field=models.DateTimeField())
+        converters = connection.ops.get_db_converters(expression) + expression.get_db_converters(connection)
+        now = timezone.now()
+        for made_key, value, expires in rows:
+            for converter in converters:
+                expires = converter(expires, expression, connection)
+            if expires < now:
+                continue
+            raw = base64.b64decode(connection.ops.process_clob(value).encode())
+            # the database cache stores "never expires" as datetime.max
+            expires_at = None if expires.year == 9999 else expires.timestamp()
+            yield CacheEntry(key_map[made_key], raw, expires_at)
+
+
+class GenericCacheAdapter(BaseCacheAdapter):
+    """
+    fallback for backends without a dedicated adapter, sizes are measured by re-pickling the values
+    """
+    reports_ttl = False
+    batch_size = 500
+
+    def probe(self, keys, version=None):
+        keys = iter(keys)
+        while True:
+            batch = list(islice(keys, self.batch_size))
+            if not batch:
+                return
+            for key, value in self.cache.get_many(batch, version).items():
+                yield CacheEntry(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), None)
+
+
+class ShardedCacheAdapter(BaseCacheAdapter):
+    """
+    probes every key on its primary shard with that shard's own adapter
+    """
+
+    @property
+    def reports_ttl(self):
+        return all(get_cache_adapter(caches[alias]).reports_ttl for alias in self.cache.shard_aliases)
+
+    def probe(self, keys, version=None):
+        keys = iter(keys)
+        while True:
+            batch = list(islice(keys, 500))
+            if not batch:
+                return
+            groups: Dict[str, List[str]] = {}
+            for key in batch:
+                groups.setdefault(self.cache.get_shard_aliases(key)[0], []).append(key)
+            for alias, shard_keys in groups.items():
+                yield from get_cache_adapter(caches[alias]).probe(shard_keys, version)
+
+
+DEFAULT_CACHE_ADAPTERS = {
+    "django.core.cache.backends.locmem.LocMemCache": "cachelizer.stats.LocMemCacheAdapter",
+    "django.core.cache.backends.filebased.FileBasedCache": "cachelizer.stats.FileBasedCacheAdapter",
+    "django.core.cache.backends.db.DatabaseCache": "cachelizer.stats.DatabaseCacheAdapter",
+    "cachelizer.sharding.ShardedCache": "cachelizer.stats.ShardedCacheAdapter",
+}
+
+
+def get_cache_adapter(cache: BaseCache) -> BaseCacheAdapter:
+    """
+    picks the adapter registered for the cache backend class (or the closest base class).
+    more adapters can be plugged in with the `CACHELIZER_CACHE_ADAPTERS` setting,
+    mapping a backend class path to an adapter class path.
+    """
+    adapters = {**DEFAULT_CACHE_ADAPTERS, **getattr(settings, "CACHELIZER_CACHE_ADAPTERS", {})}
+    for klass in type(cache).__mro__:
+        adapter_path = adapters.get(f"{klass.__module__}.{klass.__qualname__}")
+        if adapter_path:
+            return import_string(adapter_path)(cache)
+    return GenericCacheAdapter(cache)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class SerializerCacheStats:
+
+    def __init__(self, serializer_class: Type[_CashedSerializerBase], top: int = 10):
+        self.serializer_class = serializer_class
+        self.top = top
+        self.probed = 0
+        self.sizes: List[int] = []
+        self.ttls: List[float] = []
+        self.never_expire = 0
+        self.reports_ttl = True
+        self._biggest = []
+
+    @property
+    def key_count(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def total_size(self) -> int:
+        return sum(self.sizes)
+
+    @property
+    def cached_share(self) -> Optional[float]:
+        """
+        share of probed rows that currently have a cached representation. this is not a measured hit ratio,
+        it only matches one when every row is read equally often.
+        """
+        if not self.probed:
+            return None
+        return self.key_count / self.probed
+
+    @property
+    def biggest(self):
+        return sorted(self._biggest, reverse=True)
+
+    def add(self, entry: CacheEntry, now: float):
+        size = len(entry.raw)
+        self.sizes.append(size)
+        if entry.expires_at is None:
+            if self.reports_ttl:
+                self.never_expire += 1
+        else:
+            self.ttls.append(entry.expires_at - now)
+        if len(self._biggest) < self.top:
+            heapq.heappush(self._biggest, (size, entry.key))
+        else:
+            heapq.heappushpop(self._biggest, (size, entry.key))
+
+    def size_distribution(self) -> Dict[str, Optional[float]]:
+        sizes = sorted(self.sizes)
+        return {
+            "min": sizes[0] if sizes else None,
+            "p50": _percentile(sizes, 50),
+            "p90": _percentile(sizes, 90),
+            "p99": _percentile(sizes, 99),
+            "max": sizes[-1] if sizes else None,
+            "mean": self.total_size / len(sizes) if sizes else None,
+        }
+
+    def ttl_distribution(self) -> Dict[str, Optional[float]]:
+        ttls = sorted(self.ttls)
+        return {
+            "min": ttls[0] if ttls else None,
+            "p50": _percentile(ttls, 50),
+            "max": ttls[-1] if ttls else None,
+        }
+
+
+def _iter_sample_pks(model: Type[models.Model], sample: Optional[int]) -> Iterator:
+    queryset = model._default_manager.all()
+    if sample:
+        queryset = queryset.order_by("?")[:sample]
+    return queryset.values_list("pk", flat=True).iterator()
+
+
+def collect_serializer_stats(serializer_class: Type[_CashedSerializerBase],
+                             sample: Optional[int] = None,
+                             top: int = 10) -> Optional[SerializerCacheStats]:
+    """
+    probes the cache for the representations of the serializer's model rows (all of them, or a random
+    `sample`). returns None for serializers that are not bound to a model, their keys can't be enumerated.
+    """
+    if not hasattr(serializer_class, "_generate_cache_key_for_pk"):
+        return None
+    adapter = get_cache_adapter(serializer_class.get_cache())
+    stats = SerializerCacheStats(serializer_class, top=top)
+    stats.reports_ttl = adapter.reports_ttl
+
+    def keys():
+        for pk in _iter_sample_pks(serializer_class._get_model(), sample):
+            stats.probed += 1
+            yield serializer_class._generate_cache_key_for_pk(pk)
+
+    now = time.time()
+    for entry in adapter.probe(keys(), version=serializer_class._cache_version):
+        stats.add(entry, now)
+    return stats
@@ -0,0 +1,54 @@
+from typing import Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+from cachelizer.cache_serializer import CachedListSerializer
+
+
+def iter_json(items: Iterable, chunk_size: int = 500) -> Iterator[bytes]:
+    """
+    encodes the items as a json array, yielding one fragment per `chunk_size` items.
+    the encoding follows DRF's `JSONRenderer` settings (UNICODE_JSON, COMPACT_JSON, STRICT_JSON).
+    """
+    separators = (",", ":") if api_settings.COMPACT_JSON else (", ", ": ")
+    encoder = encoders.JSONEncoder(ensure_ascii=not api_settings.UNICODE_JSON, allow_nan=not api_settings.STRICT_JSON,
+                                   separators=separators)
+    fragment = ["["]
+    count = 0
+    for item in items:
+        if count:
+            fragment.append(separators[0])
+        fragment.append(encoder.encode(item))
+        count += 1
+        if count % chunk_size == 0:
+            yield "".join(fragment).encode()
+            fragment = []
+    fragment.append("]")
+    yield "".join(fragment).encode()
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    streams the representation of a `many=True` cached serializer as a json array, rendering and encoding
+    it one chunk at a time (see `CachedListSerializer.iter_representation`), so memory use doesn't grow
+    with the size of the result.
+    """
+
+    def __init__(self, serializer: CachedListSerializer, chunk_size: int = 500, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(iter_json(serializer.iter_representation(chunk_size=chunk_size), chunk_size), **kwargs)
+
+
+class StreamingListMixin:
+    """
+    a `ListAPIView` mixin answering with a `StreamingJSONResponse` of the whole (filtered) queryset,
+    for export endpoints. there is no pagination and no content negotiation, the response is always json.
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(queryset, many=True)
+        return StreamingJSONResponse(serializer, self.stream_chunk_size)
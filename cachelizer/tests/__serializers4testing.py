@@ -61,3 +61,26 @@ class GroupModelWithRandSerializer(GroupModelSerializer):
 
     def get_rand(self, instance):
         return str(random.random())
+
+
+class PetModelSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+    class Meta:
+        model = Dog
+        fields = ("id", "name",)
+
+
+class PersonWithPetModelSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    pet = PetModelSerializer()
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "pet",)
+
+
+class GroupWithPetsModelSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    people = PersonWithPetModelSerializer(many=True)
+
+    class Meta:
+        model = Group
+        fields = ("id", "name", "people",)
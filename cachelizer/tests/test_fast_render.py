@@ -0,0 +1,150 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta, CashedModelSerializer, cached_serializer
+from cachelizer.models import Person, Group, Dog
+from cachelizer.tests.__serializers4testing import PersonModelSerializer, PersonModelWithRandSerializer
+
+
+class PersonDetailsSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    surname = serializers.CharField(source="last_name")
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "surname", "created_at", "updated_at",)
+
+
+class PersonPetIdSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "pet",)
+
+
+class UpperCharField(serializers.CharField):
+
+    def to_representation(self, value):
+        return super().to_representation(value).upper()
+
+
+class PersonUpperSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    first_name = UpperCharField()
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name",)
+
+
+class DogSerializer(CashedModelSerializer):
+
+    class Meta:
+        model = Dog
+        fields = ("id", "name",)
+
+
+class PersonSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name",)
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        ret["full_name"] = f"{instance.first_name} {instance.last_name}"
+        return ret
+
+
+class NameSerializer(serializers.Serializer, metaclass=CashedSerializerMeta):
+    first_name = serializers.CharField()
+
+
+class FastRenderTestCase(TestCase):
+
+    def setUp(self):
+        PersonModelSerializer.get_cache().clear()
+        self.dog = Dog.objects.create(name="Rexy")
+        self.people = [Person.objects.create(first_name=f"John {i}", last_name="Doe", pet=self.dog if i % 2 else None)
+                       for i in range(5)]
+
+    def _assert_identical(self, serializer_class, instance):
+        serializer = serializer_class(use_cache=False)
+        expected = serializers.ModelSerializer.to_representation(serializer, instance)
+        rep = serializer._get_fast_renderer()(instance)
+        self.assertEqual(rep, expected)
+        self.assertEqual(list(rep), list(expected))
+        self.assertEqual([type(value) for value in rep.values()], [type(value) for value in expected.values()])
+
+    def test_plain_fields(self):
+        for person in self.people:
+            self._assert_identical(PersonModelSerializer, person)
+            self._assert_identical(PersonDetailsSerializer, person)
+        self._assert_identical(DogSerializer, self.dog)
+
+    def test_not_plain_fields(self):
+        self.assertIsNone(PersonPetIdSerializer()._get_fast_renderer())
+        self.assertIsNone(PersonUpperSerializer()._get_fast_renderer())
+        self.assertIsNone(PersonModelWithRandSerializer()._get_fast_renderer())
+        self.assertEqual(PersonUpperSerializer(self.people[0]).data["first_name"], "JOHN 0")
+
+    def test_custom_to_representation(self):
+        self.assertTrue(PersonModelSerializer._fast_render)
+        self.assertTrue(DogSerializer._fast_render)
+        self.assertFalse(cached_serializer(PersonSerializer)._fast_render)
+        self.assertEqual(cached_serializer(PersonSerializer)(self.people[0]).data["full_name"], "John 0 Doe")
+
+    def test_miss_uses_fast_renderer(self):
+        person = self.people[0]
+        with mock.patch.object(serializers.ModelSerializer, "to_representation") as to_representation:
+            data = PersonModelSerializer(person).data
+            with self.assertNumQueries(0):
+                self.assertEqual(PersonModelSerializer(person).data, data)
+        to_representation.assert_not_called()
+        self.assertEqual(data, {"id": person.id, "first_name": "John 0", "last_name": "Doe"})
+
+    def test_values(self):
+        queryset = Person.objects.order_by("-pk")
+        expected = PersonModelSerializer(queryset, many=True, use_cache=False).data
+        with self.assertNumQueries(1):
+            self.assertEqual(PersonModelSerializer(queryset, many=True, use_values=True, use_cache=False).data, expected)
+
+        cache = PersonModelSerializer.get_cache()
+        with self.assertNumQueries(1), mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            self.assertEqual(PersonModelSerializer(queryset, many=True, use_values=True).data, expected)
+        self.assertEqual(len(set_many.call_args[0][0]), 5)
+        # same keys as the instance path
+        with self.assertNumQueries(0), mock.patch.object(serializers.ModelSerializer, "to_representation") as to_rep:
+            self.assertEqual(PersonModelSerializer(self.people[0]).data, expected[-1])
+        to_rep.assert_not_called()
+
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            self.assertEqual(PersonModelSerializer(queryset, many=True, use_values=True).data, expected)
+        set_many.assert_not_called()
+
+    def test_values_not_plain_fields(self):
+        group = Group.objects.create(name="Group")
+        group.people.add(*self.people)
+        queryset = Person.objects.order_by("pk")
+        self.assertEqual(PersonPetIdSerializer(queryset, many=True, use_values=True).data,
+                         PersonPetIdSerializer(queryset, many=True, use_cache=False).data)
+
+    def test_values_custom_to_representation(self):
+        queryset = Person.objects.order_by("pk")
+        data = cached_serializer(PersonSerializer)(queryset, many=True, use_values=True).data
+        self.assertEqual([item["full_name"] for item in data], [f"John {i} Doe" for i in range(5)])
+
+    def test_values_regular_serializer(self):
+        queryset = Person.objects.order_by("pk")
+        data = NameSerializer(queryset, many=True, use_values=True).data
+        self.assertEqual([item["first_name"] for item in data], [f"John {i}" for i in range(5)])
+
+    def test_values_duplicate_rows(self):
+        for name in ("g1", "g2"):
+            Group.objects.create(name=name).people.add(self.people[0], self.people[1])
+        queryset = Person.objects.filter(groups__name__startswith="g").order_by("pk")
+        expected = PersonModelSerializer(queryset, many=True, use_cache=False).data
+        self.assertEqual(len(expected), 4)
+        for _ in range(2):
+            # cold, then warm
+            self.assertEqual(PersonModelSerializer(queryset, many=True, use_values=True).data, expected)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import serializers
+
+from cachelizer.models import Person, Group
+from cachelizer.tests.__serializers4testing import PersonModelSerializer, GroupModelSerializer
+
+
+class PlainPersonSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "last_name", "groups", "pet",)
+
+
+class RelatedPersonSerializer(PersonModelSerializer):
+
+    class Meta(PlainPersonSerializer.Meta):
+        pass
+
+
+class FieldsTemplateTestCase(TestCase):
+
+    def setUp(self):
+        PersonModelSerializer.get_cache().clear()
+        self.group_1: Group = Group.objects.create(name="Some Group")
+        self.person_1 = Person.objects.create(first_name="John", last_name="Doa")
+        self.group_1.people.add(self.person_1)
+
+    def test_fields_built_once_per_class(self):
+        RelatedPersonSerializer().fields
+        with mock.patch("rest_framework.serializers.model_meta.get_field_info") as get_field_info:
+            fields_1 = RelatedPersonSerializer().fields
+            fields_2 = RelatedPersonSerializer().fields
+        get_field_info.assert_not_called()
+
+        self.assertEqual(repr(fields_1), repr(PlainPersonSerializer().fields))
+        for name in fields_1:
+            self.assertIsNot(fields_1[name], fields_2[name])
+        self.assertIs(fields_1["groups"].child_relation.parent, fields_1["groups"])
+        self.assertIs(fields_2["groups"].child_relation.parent, fields_2["groups"])
+
+    def test_declared_fields_are_cloned(self):
+        fields_1 = GroupModelSerializer().fields
+        fields_2 = GroupModelSerializer().fields
+        self.assertIsNot(fields_1["people"], fields_2["people"])
+        self.assertIsNot(fields_1["people"].child, fields_2["people"].child)
+        self.assertIs(fields_1["people"].child.parent, fields_1["people"])
+
+    def test_cache_hit_skips_fields(self):
+        PersonModelSerializer(self.person_1).data
+        serializer = PersonModelSerializer(self.person_1)
+        serializer.data
+        self.assertNotIn("fields", serializer.__dict__)
+
+    def test_custom_get_fields_not_shared(self):
+        class ContextPersonSerializer(PersonModelSerializer):
+
+            def get_fields(self):
+                fields = super().get_fields()
+                if not self.context.get("full"):
+                    fields.pop("last_name")
+                return fields
+
+        self.assertNotIn("last_name", ContextPersonSerializer().fields)
+        self.assertIn("last_name", ContextPersonSerializer(context={"full": True}).fields)
+        self.assertNotIn("last_name", ContextPersonSerializer().fields)
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta, cached_serializer
+from cachelizer.models import Person, Group, Dog
+from cachelizer.tests.__serializers4testing import PersonModelSerializer, PersonModelWithRandSerializer
+
+
+def _person_serializer(*fields, **meta_options):
+    class PersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+        class Meta:
+            model = Person
+
+    PersonSerializer.Meta.fields = fields
+    for name, value in meta_options.items():
+        setattr(PersonSerializer.Meta, name, value)
+    # the fingerprint was taken when the class was created, take it again with the options set above
+    del PersonSerializer._schema_fingerprint
+    return PersonSerializer
+
+
+def _group_serializer(person_serializer):
+    class GroupSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+        people = person_serializer(many=True)
+
+        class Meta:
+            model = Group
+            fields = ("id", "name", "people",)
+
+    return GroupSerializer
+
+
+class FingerprintTestCase(TestCase):
+
+    def test_stable(self):
+        self.assertEqual(_person_serializer("id", "first_name")._get_schema_fingerprint(),
+                         _person_serializer("id", "first_name")._get_schema_fingerprint())
+        self.assertEqual(_person_serializer("id", "first_name", cache_recompute=True)._get_schema_fingerprint(),
+                         _person_serializer("id", "first_name")._get_schema_fingerprint())
+        self.assertIn("_schema_fingerprint", PersonModelSerializer.__dict__)
+
+    def test_changed(self):
+        fingerprint = _person_serializer("id", "first_name")._get_schema_fingerprint()
+        self.assertNotEqual(_person_serializer("id", "first_name", "last_name")._get_schema_fingerprint(), fingerprint)
+        self.assertNotEqual(_person_serializer("first_name", "id")._get_schema_fingerprint(), fingerprint)
+        self.assertNotEqual(_person_serializer("id", "first_name", read_only_fields=("id",))._get_schema_fingerprint(),
+                            fingerprint)
+
+    def test_subclass(self):
+        # created by the regular serializer metaclass, fingerprinted on first use
+        self.assertNotIn("_schema_fingerprint", PersonModelWithRandSerializer.__dict__)
+        self.assertNotEqual(PersonModelWithRandSerializer._get_schema_fingerprint(),
+                            PersonModelSerializer._get_schema_fingerprint())
+        self.assertIn(PersonModelWithRandSerializer._get_schema_fingerprint(),
+                      PersonModelWithRandSerializer._get_cache_key_prefix())
+
+    def test_nested(self):
+        self.assertEqual(_group_serializer(_person_serializer("id"))._get_schema_fingerprint(),
+                         _group_serializer(_person_serializer("id"))._get_schema_fingerprint())
+        self.assertNotEqual(_group_serializer(_person_serializer("id"))._get_schema_fingerprint(),
+                            _group_serializer(_person_serializer("id", "first_name"))._get_schema_fingerprint())
+
+    def test_nested_plain_serializer(self):
+        def person_serializer(*dog_fields):
+            class DogSerializer(serializers.ModelSerializer):
+
+                class Meta:
+                    model = Dog
+                    fields = dog_fields
+
+            class PersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+                pet = DogSerializer()
+                pets = DogSerializer(many=True, source="owners")
+
+                class Meta:
+                    model = Person
+                    fields = ("id", "pet", "pets",)
+
+            return PersonSerializer
+
+        self.assertEqual(person_serializer("id")._get_schema_fingerprint(),
+                         person_serializer("id")._get_schema_fingerprint())
+        self.assertNotEqual(person_serializer("id")._get_schema_fingerprint(),
+                            person_serializer("id", "name")._get_schema_fingerprint())
+
+    def test_model_field_changed(self):
+        fingerprint = _person_serializer("id", "first_name")._get_schema_fingerprint()
+        with mock.patch.object(Person._meta.get_field("first_name"), "max_length", 50):
+            self.assertNotEqual(_person_serializer("id", "first_name")._get_schema_fingerprint(), fingerprint)
+        with mock.patch.object(Person._meta.get_field("last_name"), "max_length", 50):
+            self.assertEqual(_person_serializer("id", "first_name")._get_schema_fingerprint(), fingerprint)
+
+    def test_cache_version(self):
+        class PersonSerializer(serializers.ModelSerializer):
+
+            class Meta:
+                model = Person
+                fields = ("id",)
+
+        self.assertEqual(cached_serializer(PersonSerializer, cache_version=7)._cache_version, 7)
+        self.assertIsNone(cached_serializer(PersonSerializer)._cache_version)
+        self.assertEqual(_person_serializer("id")._cache_version, None)
+
+        class VersionedPersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+            class Meta:
+                model = Person
+                fields = ("id",)
+                cache_version = 2
+
+        self.assertEqual(VersionedPersonSerializer._cache_version, 2)
+        # not part of the fingerprint, the version keeps the entries apart already
+        self.assertEqual(VersionedPersonSerializer._get_schema_fingerprint(),
+                         _person_serializer("id")._get_schema_fingerprint())
+
+    def test_all_fields(self):
+        self.assertNotEqual(_person_serializer()._get_schema_fingerprint(),
+                            _person_serializer(fields="__all__")._get_schema_fingerprint())
+
+    def test_key_namespace(self):
+        PersonModelSerializer.get_cache().clear()
+        person = Person.objects.create(first_name="John", last_name="Doa")
+        self.assertIn(PersonModelSerializer._get_schema_fingerprint(), PersonModelSerializer._generate_cache_key(person))
+
+        # a new definition of the same serializer doesn't get the entries cached by the old one
+        self.assertEqual(_person_serializer("id", "first_name")(person).data, {"id": person.id, "first_name": "John"})
+        self.assertEqual(_person_serializer("id", "first_name", "last_name")(person).data,
+                         {"id": person.id, "first_name": "John", "last_name": "Doa"})
+        # and an unchanged one does
+        person.first_name = "Jon"
+        self.assertEqual(_person_serializer("id", "first_name")(person).data["first_name"], "John")
@@ -0,0 +1,82 @@
+import tempfile
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from cachelizer.loadtest import LoadDriver, build_paths
+from cachelizer.models import Person, Group, Dog
+from cachelizer.serializers import PersonSerializer
+
+
+def _generate_data():
+    PersonSerializer.get_cache().clear()
+    with open(os.devnull, "w") as devnull:
+        call_command("cachelizer_gendata", dogs=5, people=30, groups=4, group_size=5, seed=1, stdout=devnull)
+
+
+class DemoApiTestCase(TestCase):
+
+    def setUp(self):
+        _generate_data()
+
+    def test_gendata(self):
+        self.assertEqual(Dog.objects.count(), 5)
+        self.assertEqual(Person.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertTrue(all(group.people.count() == 5 for group in Group.objects.all()))
+
+    def test_endpoints(self):
+        group = Group.objects.first()
+        data = self.client.get(f"/api/groups/{group.pk}/").json()
+        self.assertEqual(len(data["people"]), 5)
+        self.assertEqual(self.client.get("/api/people/").json()["count"], 30)
+
+        person = group.people.first()
+        response = self.client.patch(f"/api/people/{person.pk}/", data={"first_name": "Changed"},
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(ROOT_URLCONF="cachelizer.loadtest_urls")
+    def test_harness_write_route(self):
+        group = Group.objects.first()
+        self.client.get(f"/api/groups/{group.pk}/")
+        person = group.people.order_by("pk").first()
+        response = self.client.patch(f"/api/people/{person.pk}/", data={"first_name": "Changed"},
+                                     content_type="application/json")
+        self.assertEqual(response.json()["first_name"], "Changed")
+        self.assertEqual(self.client.get(f"/api/people/{person.pk}/").json()["first_name"], "Changed")
+        # the group embedding the person is refreshed too
+        people = self.client.get(f"/api/groups/{group.pk}/").json()["people"]
+        self.assertIn("Changed", [item["first_name"] for item in people])
+
+
+class LoadDriverTestCase(TransactionTestCase):
+    # the driver requests from worker threads, which can't see (or write around) a TestCase transaction
+
+    def setUp(self):
+        _generate_data()
+
+    def test_load_driver(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            driver = LoadDriver(build_paths(sample=5), requests=40, concurrency=1, profile_dir=profile_dir, seed=1)
+            cold = driver.run("cold")
+            warm = driver.run("warm")
+            mixed = LoadDriver(build_paths(sample=5), requests=40, concurrency=1, write_ratio=0.5, seed=1).run("mixed")
+            self.assertTrue(os.path.exists(os.path.join(profile_dir, "warm-wsgi.prof")))
+
+        for report in (cold, warm, mixed):
+            self.assertEqual(report.requests, 40)
+            self.assertEqual(report.errors, 0)
+        self.assertLess(warm.sql, cold.sql)
+        self.assertGreater(warm.cache_calls, 0)
+        self.assertGreater(mixed.writes, 0)
+
+    @override_settings(CACHES={**settings.CACHES,
+                               "other": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_prepare_keeps_other_caches(self):
+        caches["other"].set("key", "value")
+        LoadDriver(build_paths(sample=1), requests=1)._prepare("cold")
+        self.assertEqual(caches["other"].get("key"), "value")
@@ -0,0 +1,102 @@
+import time
+from unittest import mock
+
+from django.db import transaction
+from django.test import TransactionTestCase
+from rest_framework.generics import ListAPIView
+from rest_framework.test import APIRequestFactory
+
+from cachelizer.generations import get_model_generation
+from cachelizer.models import Person
+from cachelizer.pagination import CachedPageNumberPagination, CachedLimitOffsetPagination
+from cachelizer.tests.__serializers4testing import PersonModelSerializer
+
+
+class PageNumberPagination(CachedPageNumberPagination):
+    page_size = 2
+
+
+class PersonListView(ListAPIView):
+    queryset = Person.objects.order_by("last_name", "pk")
+    serializer_class = PersonModelSerializer
+    pagination_class = PageNumberPagination
+    authentication_classes = ()
+    permission_classes = ()
+
+
+class PersonLimitOffsetListView(PersonListView):
+    pagination_class = CachedLimitOffsetPagination
+
+
+class PaginationTestCase(TransactionTestCase):
+    # generations are bumped when writes commit, which never happens inside a TestCase
+
+    def setUp(self):
+        PersonModelSerializer.get_cache().clear()
+        self.factory = APIRequestFactory()
+        self.people = [Person.objects.create(first_name=f"John {i}", last_name=f"Doa {i}") for i in range(5)]
+
+    def _get(self, view_class, **params):
+        response = view_class.as_view()(self.factory.get("/people/", params))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_page_number(self):
+        data = self._get(PersonListView, page=2)
+        self.assertEqual(data["count"], 5)
+        self.assertEqual([person["id"] for person in data["results"]], [self.people[2].pk, self.people[3].pk])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(PersonListView, page=2), data)
+
+    def test_limit_offset(self):
+        data = self._get(PersonLimitOffsetListView, limit=3, offset=1)
+        self.assertEqual(data["count"], 5)
+        self.assertEqual([person["id"] for person in data["results"]], [p.pk for p in self.people[1:4]])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(PersonLimitOffsetListView, limit=3, offset=1), data)
+
+    def test_write_invalidates(self):
+        self._get(PersonListView, page=1)
+        generation = get_model_generation(Person)
+
+        person = Person.objects.create(first_name="Aaron", last_name="Aardvark")
+        self.assertNotEqual(get_model_generation(Person), generation)
+
+        data = self._get(PersonListView, page=1)
+        self.assertEqual(data["count"], 6)
+        self.assertEqual(data["results"][0]["id"], person.pk)
+
+    def test_bump_on_commit(self):
+        generation = get_model_generation(Person)
+        with transaction.atomic():
+            Person.objects.create(first_name="Aaron", last_name="Aardvark")
+            # readers still see the old rows, they must not cache them under a new generation
+            self.assertEqual(get_model_generation(Person), generation)
+        self.assertNotEqual(get_model_generation(Person), generation)
+
+    def test_generation_does_not_expire(self):
+        Person.objects.create(first_name="Aaron", last_name="Aardvark")
+        generation = get_model_generation(Person)
+        # an hour later, past the cache's default timeout
+        with mock.patch("time.time", return_value=time.time() + 60 * 60):
+            self.assertEqual(get_model_generation(Person), generation)
+
+    def test_partially_cached_page(self):
+        self._get(PersonListView, page=1)
+        PersonModelSerializer(self.people[0]).invalidate_cache()
+
+        with self.assertNumQueries(1):
+            data = self._get(PersonListView, page=1)
+        self.assertEqual(data["results"][0], {"id": self.people[0].pk, "first_name": "John 0", "last_name": "Doa 0"})
+
+    def test_warm_page_fetched_once(self):
+        data = self._get(PersonListView, page=1)
+        cache = PersonModelSerializer.get_cache()
+        with mock.patch.object(cache, "get", wraps=cache.get) as get:
+            self.assertEqual(self._get(PersonListView, page=1), data)
+        keys = [call[0][0] for call in get.call_args_list]
+        item_keys = [PersonModelSerializer(person)._get_cache_key(person) for person in self.people[:2]]
+        # looked up by the paginator only, the serializer reuses the entries
+        self.assertEqual([keys.count(key) for key in item_keys], [1, 1])
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta, unregister_serializer
+from cachelizer.models import Person, Group
+from cachelizer.recompute import RecomputeQueue, get_recompute_queue, _get_recomputed_serializers
+
+
+class RecomputedPersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "last_name",)
+        cache_recompute = True
+
+
+class RecomputedGroupSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    people = RecomputedPersonSerializer(many=True)
+
+    class Meta:
+        model = Group
+        fields = ("id", "name", "people",)
+        cache_recompute = True
+
+
+def tearDownModule():
+    # keep the saves of the other test modules from feeding the queue
+    unregister_serializer(RecomputedPersonSerializer)
+    unregister_serializer(RecomputedGroupSerializer)
+    get_recompute_queue().stop(flush=False)
+
+
+@override_settings(CACHELIZER_RECOMPUTE={"AUTOSTART": False})
+class RecomputeTestCase(TransactionTestCase):
+    # events are published on commit, which a TestCase never does
+
+    def setUp(self):
+        RecomputedPersonSerializer.get_cache().clear()
+        self.queue = get_recompute_queue()
+        self.person_1 = Person.objects.create(first_name="John", last_name="Doa")
+        self.group_1 = Group.objects.create(name="Some Group")
+        self.queue.run_pending()
+
+    def test_coalesced_recompute(self):
+        RecomputedPersonSerializer(self.person_1).data
+        for name in ("Jo", "Jon", "Johnny"):
+            self.person_1.first_name = name
+            self.person_1.save()
+        self.assertEqual(RecomputedPersonSerializer(self.person_1).data["first_name"], "John")
+
+        with mock.patch.object(RecomputeQueue, "recompute", wraps=RecomputeQueue.recompute) as recompute:
+            self.queue.run_pending()
+        recompute.assert_called_once_with(RecomputedPersonSerializer, [self.person_1.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(RecomputedPersonSerializer(self.person_1).data["first_name"], "Johnny")
+
+    def test_m2m_and_delete(self):
+        RecomputedGroupSerializer(self.group_1).data
+        self.group_1.people.add(self.person_1)
+        self.queue.run_pending()
+        self.assertEqual(len(RecomputedGroupSerializer(self.group_1).data["people"]), 1)
+
+        key = RecomputedPersonSerializer._generate_cache_key(self.person_1)
+        self.assertIn(key, RecomputedPersonSerializer.get_cache())
+        self.person_1.delete()
+        self.queue.run_pending()
+        self.assertNotIn(key, RecomputedPersonSerializer.get_cache())
+
+    def test_published_on_commit(self):
+        with transaction.atomic():
+            self.person_1.first_name = "Jon"
+            self.person_1.save()
+            self.assertIsNone(self.queue.broker.consume(timeout=0))
+        self.assertEqual(self.queue.broker.consume(timeout=0).pk, self.person_1.pk)
+
+        with self.assertRaises(ValueError), transaction.atomic():
+            self.person_1.save()
+            raise ValueError()
+        self.assertIsNone(self.queue.broker.consume(timeout=0))
+
+    def test_model_serializers_only(self):
+        class PlainPersonSerializer(serializers.Serializer, metaclass=CashedSerializerMeta):
+            first_name = serializers.CharField()
+
+            class Meta:
+                model = Person
+                cache_recompute = True
+
+        self.addCleanup(unregister_serializer, PlainPersonSerializer)
+        self.assertEqual(_get_recomputed_serializers(Person), [RecomputedPersonSerializer])
+        self.person_1.save()
+        self.queue.run_pending()
+
+    def test_window(self):
+        recompute_queue = RecomputeQueue(window=60)
+        recompute_queue.enqueue(RecomputedPersonSerializer, self.person_1.pk)
+        with mock.patch.object(RecomputeQueue, "recompute") as recompute:
+            recompute_queue.run_pending(force=False)
+            recompute.assert_not_called()
+            recompute_queue.run_pending(force=True)
+            recompute.assert_called_once_with(RecomputedPersonSerializer, [self.person_1.pk])
+
+
+@override_settings(CACHELIZER_RECOMPUTE={"AUTOSTART": False})
+class BackgroundRecomputeTestCase(TransactionTestCase):
+
+    def test_workers(self):
+        RecomputedPersonSerializer.get_cache().clear()
+        person = Person.objects.create(first_name="John", last_name="Doa")
+        recompute_queue = RecomputeQueue(window=0.05)
+        recompute_queue.start()
+        try:
+            for _ in range(2):
+                recompute_queue.enqueue(RecomputedPersonSerializer, person.pk)
+            Person.objects.filter(pk=person.pk).update(first_name="Jon")
+        finally:
+            recompute_queue.stop()
+        self.assertEqual(RecomputedPersonSerializer(person).data["first_name"], "Jon")
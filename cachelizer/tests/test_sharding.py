@@ -0,0 +1,116 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+
+from cachelizer.sharding import HashRing
+from cachelizer.stats import get_cache_adapter, ShardedCacheAdapter
+
+SHARDED_CACHES = {
+    "shard_1": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shard_1"},
+    "shard_2": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shard_2"},
+    "shard_3": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shard_3"},
+    "sharded": {
+        "BACKEND": "cachelizer.sharding.ShardedCache",
+        "LOCATION": ["shard_1", "shard_2", "shard_3"],
+        "OPTIONS": {"HOT_KEY_REPLICAS": 1, "HOT_KEY_THRESHOLD": 3},
+    },
+}
+
+
+class HashRingTestCase(TestCase):
+
+    def test_consistent(self):
+        keys = [f"key_{i}" for i in range(1000)]
+        ring = HashRing(["a", "b", "c"])
+        smaller_ring = HashRing(["a", "b"])
+        owners = {key: ring.get_nodes(key)[0] for key in keys}
+        self.assertEqual(set(owners.values()), {"a", "b", "c"})
+        for key, owner in owners.items():
+            if owner != "c":
+                self.assertEqual(smaller_ring.get_nodes(key)[0], owner)
+
+    def test_replicas_are_distinct(self):
+        ring = HashRing(["a", "b", "c"])
+        self.assertEqual(len(set(ring.get_nodes("some key", 2))), 2)
+        self.assertEqual(sorted(ring.get_nodes("some key", 5)), ["a", "b", "c"])
+
+
+@override_settings(CACHES=SHARDED_CACHES)
+class ShardedCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = caches["sharded"]
+        self.cache.clear()
+
+    def test_spread_and_batch(self):
+        data = {f"key_{i}": i for i in range(60)}
+        self.cache.set_many(data)
+        self.assertEqual(self.cache.get_many(list(data) + ["missing"]), data)
+        for alias in ("shard_1", "shard_2", "shard_3"):
+            self.assertTrue(0 < len(caches[alias]._cache) < 60)
+        self.assertEqual(self.cache.get("key_7"), 7)
+
+        self.cache.delete_many(["key_1", "key_2"])
+        self.assertNotIn("key_1", self.cache)
+        self.assertIn("key_3", self.cache)
+
+    def test_hot_key_replication(self):
+        self.cache.set("hot", "value")
+        primary, replica = self.cache.get_shard_aliases("hot")
+        self.assertIsNone(caches[replica].get("hot"))
+
+        for _ in range(10):
+            self.assertEqual(self.cache.get("hot"), "value")
+        self.assertEqual(caches[replica].get("hot"), "value")
+
+        self.cache.set("hot", "new value")
+        self.assertEqual(caches[replica].get("hot"), "new value")
+        self.cache.delete("hot")
+        self.assertIsNone(caches[primary].get("hot"))
+        self.assertIsNone(caches[replica].get("hot"))
+
+    def test_read_repair_keeps_ttl(self):
+        self.cache.set("short", "value", timeout=5)
+        primary, replica = self.cache.get_shard_aliases("short")
+        # hot reads go to the replica
+        with mock.patch("cachelizer.sharding.random.choice", side_effect=lambda aliases: aliases[-1]):
+            for _ in range(5):
+                self.assertEqual(self.cache.get("short"), "value")
+        [primary_entry] = get_cache_adapter(caches[primary]).probe(["short"])
+        [replica_entry] = get_cache_adapter(caches[replica]).probe(["short"])
+        self.assertLessEqual(replica_entry.expires_at, primary_entry.expires_at)
+
+    def test_cold_writes_skip_replicas(self):
+        with mock.patch.object(LocMemCache, "delete") as delete, \
+                mock.patch.object(LocMemCache, "delete_many") as delete_many:
+            self.cache.set_many({f"cold_{i}": i for i in range(10)})
+        # no deletes of copies this process never made
+        delete.assert_not_called()
+        delete_many.assert_not_called()
+
+        self.cache.set("replicated", "value")
+        for _ in range(10):
+            self.cache.get("replicated")
+        replica = self.cache.get_shard_aliases("replicated")[1]
+        self.assertEqual(caches[replica].get("replicated"), "value")
+        # the key cooled down, its copy is dropped rather than left stale
+        with mock.patch.object(self.cache._hot_keys, "is_hot", return_value=False):
+            self.cache.set("replicated", "new value")
+        self.assertIsNone(caches[replica].get("replicated"))
+
+    def test_incr_drops_replicas(self):
+        self.cache.set("counter", 1)
+        for _ in range(10):
+            self.cache.get("counter")
+        self.assertEqual(self.cache.incr("counter"), 2)
+        for _ in range(10):
+            self.assertEqual(self.cache.get("counter"), 2)
+
+    def test_stats_adapter(self):
+        self.cache.set_many({f"key_{i}": i for i in range(10)})
+        adapter = get_cache_adapter(self.cache)
+        self.assertIsInstance(adapter, ShardedCacheAdapter)
+        self.assertEqual(sorted(entry.key for entry in adapter.probe(["key_1", "key_5", "missing"])),
+                         ["key_1", "key_5"])
@@ -0,0 +1,158 @@
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.test import TransactionTestCase
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta, cached_serializer
+from cachelizer.generations import _get_generation_cache, _generation_key
+from cachelizer.models import Person, Group
+from cachelizer.snapshot import dump_snapshot, load_snapshot, SnapshotError, _bucket_timeout
+from cachelizer.stats import LocMemCacheAdapter
+
+
+class SnapshotPersonSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "last_name",)
+
+
+SnapshotPersonSerializer = cached_serializer(SnapshotPersonSerializer, cache=LocMemCache("cachelizer-snapshot-test", {}))
+
+
+class SnapshotGroupSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    people = SnapshotPersonSerializer(many=True)
+
+    class Meta:
+        model = Group
+        fields = ("id", "name", "people",)
+
+
+class SnapshotTestCase(TransactionTestCase):
+    # generations are bumped when writes commit, which never happens inside a TestCase
+
+    def setUp(self):
+        SnapshotPersonSerializer.get_cache().clear()
+        SnapshotGroupSerializer.get_cache().clear()
+        self.people = [Person.objects.create(first_name=f"John {i}", last_name="Doe") for i in range(4)]
+        self.group = Group.objects.create(name="Group")
+        self.group.people.add(*self.people[:2])
+        self.person_data = SnapshotPersonSerializer(self.people[:3], many=True).data
+        self.group_data = SnapshotGroupSerializer(self.group).data
+
+    def _dump(self):
+        file = io.BytesIO()
+        counts = dump_snapshot(file, [SnapshotPersonSerializer, SnapshotGroupSerializer])
+        file.seek(0)
+        return file, counts
+
+    def _clear(self):
+        # only the entries, the default cache holds the generation counters as well
+        SnapshotPersonSerializer.get_cache().clear()
+        SnapshotGroupSerializer.get_cache().delete(SnapshotGroupSerializer._generate_cache_key(self.group))
+
+    def _assert_cached(self, serializer_class, instance, expected):
+        key = serializer_class._generate_cache_key(instance)
+        self.assertEqual(serializer_class.get_cache().get(key, version=serializer_class._cache_version), expected)
+
+    def test_round_trip(self):
+        file, counts = self._dump()
+        self.assertEqual(counts, {"cachelizer.tests.test_snapshot.SnapshotPersonSerializer": 3,
+                                  "cachelizer.tests.test_snapshot.SnapshotGroupSerializer": 1})
+        self._clear()
+
+        cache = SnapshotPersonSerializer.get_cache()
+        with mock.patch.object(cache, "set_many", wraps=cache.set_many) as set_many:
+            sections = load_snapshot(file, batch_size=2)
+        self.assertEqual(set_many.call_count, 2)
+        self.assertEqual([(section.loaded, section.skipped, section.reason) for section in sections],
+                         [(3, 0, None), (1, 0, None)])
+        for person, data in zip(self.people, self.person_data):
+            self._assert_cached(SnapshotPersonSerializer, person, data)
+        self._assert_cached(SnapshotGroupSerializer, self.group, self.group_data)
+
+    def test_other_backend(self):
+        file, _ = self._dump()
+        other_cache = LocMemCache("cachelizer-snapshot-other", {})
+        with mock.patch.object(SnapshotGroupSerializer, "_cache", other_cache):
+            load_snapshot(file)
+            self._assert_cached(SnapshotGroupSerializer, self.group, self.group_data)
+
+    def test_model_changed(self):
+        file, _ = self._dump()
+        self._clear()
+        self.people[3].save()
+        sections = load_snapshot(file)
+        self.assertEqual([(section.loaded, section.skipped, section.reason) for section in sections],
+                         [(0, 3, "cachelizer.person changed"), (0, 1, "cachelizer.person changed")])
+
+    def test_unknown_generations(self):
+        file, _ = self._dump()
+        self._clear()
+        _get_generation_cache().delete_many([_generation_key(Person), _generation_key(Group)])
+        sections = load_snapshot(file)
+        self.assertEqual([(section.loaded, section.reason) for section in sections],
+                         [(0, "cachelizer.person generation unknown"), (0, "cachelizer.group generation unknown")])
+
+        file.seek(0)
+        self.assertTrue(all(section.reason is None for section in load_snapshot(file, force=True)))
+        self._assert_cached(SnapshotGroupSerializer, self.group, self.group_data)
+
+    def test_remaining_ttl(self):
+        adapter = LocMemCacheAdapter(SnapshotPersonSerializer.get_cache())
+        key = SnapshotPersonSerializer._generate_cache_key(self.people[0])
+        expires_at = next(adapter.probe([key])).expires_at
+        file, _ = self._dump()
+        self._clear()
+        # load 1000s before the entry would have expired
+        now = expires_at - 1000
+        with mock.patch("cachelizer.snapshot.time.time", return_value=now), \
+                mock.patch("django.core.cache.backends.base.time.time", return_value=now):
+            load_snapshot(file)
+        restored = next(adapter.probe([key])).expires_at
+        self.assertLessEqual(restored, expires_at)
+        self.assertGreater(restored, expires_at - 1000 / 8)
+
+    def test_serializer_changed(self):
+        file, _ = self._dump()
+        self._clear()
+        with mock.patch.object(SnapshotGroupSerializer, "_schema_fingerprint", "0" * 12):
+            sections = load_snapshot(file)
+        self.assertEqual([section.reason for section in sections], [None, "serializer changed"])
+
+    def test_expired(self):
+        file, _ = self._dump()
+        self._clear()
+        with mock.patch("cachelizer.snapshot.time.time", return_value=4102444800 + SnapshotGroupSerializer._cache_timeout):
+            sections = load_snapshot(file)
+        self.assertEqual([(section.loaded, section.skipped) for section in sections], [(0, 3), (0, 1)])
+
+    def test_bucket_timeout(self):
+        self.assertEqual(_bucket_timeout(10.5), 10)
+        for remaining in (100, 1000, 5000, 86399):
+            self.assertLessEqual(_bucket_timeout(remaining), remaining)
+            self.assertGreater(_bucket_timeout(remaining), remaining * 7 / 8)
+
+    def test_invalid(self):
+        with self.assertRaises(SnapshotError):
+            load_snapshot(io.BytesIO(b"something else"))
+        file, _ = self._dump()
+        with self.assertRaises(SnapshotError):
+            load_snapshot(io.BytesIO(file.getvalue()[:-10]))
+
+    def test_commands(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snapshot.gz")
+            out = io.StringIO()
+            call_command("cachelizer_dump_snapshot", path, serializer=["SnapshotGroupSerializer"], stdout=out)
+            self.assertIn("SnapshotGroupSerializer: 1 entries", out.getvalue())
+            self._clear()
+            out = io.StringIO()
+            call_command("cachelizer_load_snapshot", path, stdout=out)
+            self.assertIn("SnapshotGroupSerializer: 1 loaded, 0 skipped", out.getvalue())
+        self._assert_cached(SnapshotGroupSerializer, self.group, self.group_data)
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import cached_serializer, get_registered_serializers
+from cachelizer.models import Person
+from cachelizer.stats import collect_serializer_stats, get_cache_adapter, LocMemCacheAdapter, FileBasedCacheAdapter, \
+    DatabaseCacheAdapter
+from cachelizer.tests.__serializers4testing import PersonModelSerializer
+
+
+class LocMemPersonSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "last_name",)
+
+
+LocMemPersonSerializer = cached_serializer(LocMemPersonSerializer, cache=LocMemCache("cachelizer-stats-test", {}))
+
+
+class StatsTestCase(TestCase):
+
+    def setUp(self):
+        LocMemPersonSerializer.get_cache().clear()
+        PersonModelSerializer.get_cache().clear()
+        self.person_1 = Person.objects.create(first_name="John", last_name="Doa")
+        self.person_2 = Person.objects.create(first_name="David", last_name="Dodo")
+        self.person_3 = Person.objects.create(first_name="Bartholomew", last_name="Longername")
+
+    def test_registry(self):
+        self.assertIn(LocMemPersonSerializer, get_registered_serializers())
+        self.assertIn(PersonModelSerializer, get_registered_serializers())
+
+    def test_adapters(self):
+        self.assertIsInstance(get_cache_adapter(LocMemPersonSerializer.get_cache()), LocMemCacheAdapter)
+        self.assertIsInstance(get_cache_adapter(PersonModelSerializer.get_cache()), FileBasedCacheAdapter)
+
+    def test_locmem_stats(self):
+        LocMemPersonSerializer([self.person_1, self.person_3], many=True).data
+
+        stats = collect_serializer_stats(LocMemPersonSerializer, top=1)
+        self.assertEqual(stats.probed, 3)
+        self.assertEqual(stats.key_count, 2)
+        self.assertAlmostEqual(stats.cached_share, 2 / 3)
+        self.assertEqual(stats.biggest[0][1], LocMemPersonSerializer._generate_cache_key(self.person_3))
+        self.assertEqual(len(stats.ttls), 2)
+        self.assertTrue(all(0 < ttl <= LocMemPersonSerializer._cache_timeout for ttl in stats.ttls))
+
+    def test_file_based_stats(self):
+        PersonModelSerializer(self.person_2).data
+
+        stats = collect_serializer_stats(PersonModelSerializer)
+        self.assertEqual(stats.key_count, 1)
+        self.assertEqual(stats.biggest[0][1], PersonModelSerializer._generate_cache_key(self.person_2))
+
+    @override_settings(CACHES={"db": {"BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                                      "LOCATION": "cachelizer_stats_test"}})
+    def test_database_stats(self):
+        call_command("createcachetable", "--database=default")
+        cache = DatabaseCache("cachelizer_stats_test", {})
+        cache.set(LocMemPersonSerializer._generate_cache_key(self.person_1), {"id": self.person_1.id}, 60)
+        cache.set(LocMemPersonSerializer._generate_cache_key(self.person_2), {"id": self.person_2.id}, None)
+
+        adapter = get_cache_adapter(cache)
+        self.assertIsInstance(adapter, DatabaseCacheAdapter)
+        keys = [LocMemPersonSerializer._generate_cache_key(person)
+                for person in (self.person_1, self.person_2, self.person_3)]
+        entries = {entry.key: entry for entry in adapter.probe(keys)}
+        self.assertEqual(set(entries), set(keys[:2]))
+        self.assertIsNone(entries[keys[1]].expires_at)
+        self.assertIsNotNone(entries[keys[0]].expires_at)
+
+    def test_command(self):
+        LocMemPersonSerializer(self.person_1).data
+        out = StringIO()
+        call_command("cachelizer_stats", serializer=["LocMemPersonSerializer"], stdout=out)
+        self.assertIn("keys:                1 of 3 probed rows", out.getvalue())
@@ -0,0 +1,82 @@
+import json
+from unittest import mock
+
+from django.test import TestCase
+
+from cachelizer.models import Person, Group, Dog
+from cachelizer.streaming import iter_json, StreamingJSONResponse
+from cachelizer.tests.__serializers4testing import GroupWithPetsModelSerializer
+
+
+class StreamingTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = GroupWithPetsModelSerializer.get_cache()
+        self.cache.clear()
+        dog = Dog.objects.create(name="Rexy")
+        for i in range(7):
+            group = Group.objects.create(name=f"Group {i}")
+            group.people.add(Person.objects.create(first_name=f"John {i}", last_name="Doa", pet=dog),
+                             Person.objects.create(first_name=f"David {i}", last_name="Dodo"))
+        self.queryset = Group.objects.prefetch_related("people__pet").order_by("pk")
+        data = GroupWithPetsModelSerializer(self.queryset, many=True, use_cache=False).data
+        self.expected = json.loads(json.dumps(data))
+        # the nested serializers above did cache
+        self.cache.clear()
+
+    def test_iter_representation(self):
+        serializer = GroupWithPetsModelSerializer(self.queryset, many=True)
+        with mock.patch.object(self.cache, "get_many", wraps=self.cache.get_many) as get_many:
+            items = list(serializer.iter_representation(chunk_size=3))
+        self.assertEqual(json.loads(json.dumps(items)), self.expected)
+        # 3 chunks, each with a lookup of its roots and one of the nested serializers of the missed roots
+        self.assertEqual(get_many.call_count, 6)
+
+        self.assertEqual(self.cache.get(GroupWithPetsModelSerializer._generate_cache_key(self.queryset[0])), items[0])
+        with self.assertNumQueries(1), mock.patch.object(self.cache, "get_many", wraps=self.cache.get_many) as get_many:
+            # only the groups, the cache is warm now so nothing gets prefetched
+            self.assertEqual(list(serializer.iter_representation(chunk_size=10)), items)
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_prefetch_missed_only(self):
+        list(GroupWithPetsModelSerializer(self.queryset[:2], many=True).iter_representation())
+        # the groups, then the people and pets of the 5 groups that missed
+        with self.assertNumQueries(3) as queries:
+            items = list(GroupWithPetsModelSerializer(self.queryset, many=True).iter_representation(chunk_size=10))
+        missed = [group.pk for group in self.queryset[2:]]
+        self.assertIn(f"IN ({', '.join(map(str, missed))})", queries.captured_queries[1]["sql"])
+        self.assertEqual(json.loads(json.dumps(items)), self.expected)
+
+    def test_iter_representation_is_lazy(self):
+        iterator = GroupWithPetsModelSerializer(self.queryset, many=True).iter_representation(chunk_size=2)
+        with mock.patch.object(self.cache, "set_many", wraps=self.cache.set_many) as set_many:
+            next(iterator)
+            self.assertEqual(set_many.call_count, 1)
+            self.assertEqual(len(set_many.call_args[0][0]), 2 + 4 + 1)
+
+    def test_abandoned_scope(self):
+        serializer = GroupWithPetsModelSerializer(self.queryset, many=True, cache_scope=True)
+        iterator = serializer.iter_representation(chunk_size=2)
+        next(iterator)
+        self.assertEqual(GroupWithPetsModelSerializer._context_cache_count, 1)
+        # e.g. the client disconnected
+        iterator.close()
+        self.assertEqual(GroupWithPetsModelSerializer._context_cache_count, 0)
+        self.assertFalse(GroupWithPetsModelSerializer._context_cache_keys)
+
+    def test_iter_json(self):
+        fragments = list(iter_json(iter(range(5)), chunk_size=2))
+        self.assertEqual(len(fragments), 3)
+        self.assertEqual(json.loads(b"".join(fragments)), list(range(5)))
+        self.assertEqual(json.loads(b"".join(iter_json([]))), [])
+
+    def test_response(self):
+        response = StreamingJSONResponse(GroupWithPetsModelSerializer(self.queryset, many=True), chunk_size=3)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), self.expected)
+
+    def test_export_endpoint(self):
+        response = self.client.get("/api/groups/export/")
+        self.assertTrue(response.streaming)
+        data = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([group["name"] for group in data], [f"Group {i}" for i in range(7)])
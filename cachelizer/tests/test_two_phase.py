@@ -0,0 +1,47 @@
+from django.test import TestCase
+
+from cachelizer.loadtest import CallCounters
+from cachelizer.models import Person, Group, Dog
+from cachelizer.tests.__serializers4testing import PersonWithPetModelSerializer, GroupWithPetsModelSerializer
+
+
+class TwoPhaseTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = GroupWithPetsModelSerializer.get_cache()
+        self.cache.clear()
+        self.dog_1 = Dog.objects.create(name="Rexy")
+        self.dog_2 = Dog.objects.create(name="Lassie")
+        self.groups = []
+        for i in range(3):
+            group = Group.objects.create(name=f"Group {i}")
+            group.people.add(Person.objects.create(first_name=f"John {i}", last_name="Doa", pet=self.dog_1),
+                             Person.objects.create(first_name=f"David {i}", last_name="Dodo", pet=self.dog_2))
+            self.groups.append(group)
+        self.expected = GroupWithPetsModelSerializer(self.groups, many=True, use_cache=False).data
+
+    def test_cold_and_warm_list(self):
+        queryset = Group.objects.filter(pk__in=[g.pk for g in self.groups]).order_by("pk")
+        with CallCounters().install() as calls:
+            data = GroupWithPetsModelSerializer(queryset, many=True, two_phase=True).data
+        self.assertEqual(data, self.expected)
+        self.assertEqual(calls.cache_methods, {"get_many": 2, "set_many": 1})
+
+        with self.assertNumQueries(0), CallCounters().install() as calls:
+            data = GroupWithPetsModelSerializer(self.groups, many=True, two_phase=True).data
+        self.assertEqual(data, self.expected)
+        self.assertEqual(calls.cache_methods, {"get_many": 1})
+
+    def test_partially_warm_single(self):
+        person = self.groups[0].people.order_by("pk").first()
+        PersonWithPetModelSerializer(person).data
+        self.assertIn(PersonWithPetModelSerializer._generate_cache_key(person), self.cache)
+
+        with CallCounters().install() as calls:
+            data = GroupWithPetsModelSerializer(self.groups[0], two_phase=True).data
+        self.assertEqual(data, self.expected[0])
+        self.assertEqual(calls.cache_methods, {"get_many": 2, "set_many": 1})
+
+        with CallCounters().install() as calls:
+            self.assertEqual(GroupWithPetsModelSerializer(self.groups[0]).data, self.expected[0])
+        self.assertEqual(calls.cache_methods, {"get": 1})
@@ -0,0 +1,95 @@
+from django.test import TestCase
+from rest_framework import serializers
+
+from cachelizer.cache_serializer import CashedSerializerMeta
+from cachelizer.models import Person, Group
+
+
+def language(context):
+    return context.get("language")
+
+
+class GreetingPersonSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    greeting = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Person
+        fields = ("id", "first_name", "greeting",)
+        cache_vary_on = (language,)
+
+    def get_greeting(self, instance):
+        return {"en": "Hello", "fr": "Bonjour"}.get(self.context.get("language"), "Hi")
+
+
+class GreetingUserSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    greeting = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Person
+        fields = ("id", "greeting",)
+        cache_vary_on = (lambda context: context.get("language"), lambda context: context.get("user"))
+
+    def get_greeting(self, instance):
+        greeting = {"en": "Hello", "fr": "Bonjour"}.get(self.context.get("language"), "Hi")
+        return f"{greeting} {self.context.get('user')}"
+
+
+class GreetingGroupSerializer(serializers.ModelSerializer, metaclass=CashedSerializerMeta):
+    people = GreetingPersonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Group
+        fields = ("id", "name", "people",)
+
+
+class VaryOnTestCase(TestCase):
+
+    def setUp(self):
+        GreetingPersonSerializer.get_cache().clear()
+        self.person_1 = Person.objects.create(first_name="John", last_name="Doa")
+        self.person_2 = Person.objects.create(first_name="David", last_name="Dodo")
+
+    def test_variants(self):
+        self.assertEqual(GreetingPersonSerializer(self.person_1, context={"language": "en"}).data["greeting"], "Hello")
+        self.assertEqual(GreetingPersonSerializer(self.person_1, context={"language": "fr"}).data["greeting"],
+                         "Bonjour")
+        self.assertEqual(GreetingPersonSerializer(self.person_1).data["greeting"], "Hi")
+
+        self.person_1.first_name = "john"
+        self.person_1.save()
+        data = GreetingPersonSerializer([self.person_1, self.person_2], many=True, context={"language": "fr"}).data
+        self.assertEqual(data[0], {"id": self.person_1.id, "first_name": "John", "greeting": "Bonjour"})
+        self.assertEqual(data[1]["greeting"], "Bonjour")
+
+    def test_lambdas(self):
+        GreetingUserSerializer.get_cache().clear()
+        for language, user, greeting in (("en", "bob", "Hello bob"), ("fr", "bob", "Bonjour bob"),
+                                         ("fr", "alice", "Bonjour alice")):
+            data = GreetingUserSerializer(self.person_1, context={"language": language, "user": user}).data
+            self.assertEqual(data["greeting"], greeting)
+
+    def test_shared_variant(self):
+        serializer = GreetingPersonSerializer(self.person_1, context={"language": None, "request": None})
+        self.assertEqual(serializer._get_cache_key(self.person_1),
+                         GreetingPersonSerializer._generate_cache_key(self.person_1))
+        self.assertNotEqual(GreetingPersonSerializer(context={"language": "en"})._get_cache_key(self.person_1),
+                            GreetingPersonSerializer._generate_cache_key(self.person_1))
+
+    def test_invalidate(self):
+        GreetingPersonSerializer(self.person_1, context={"language": "en"}).data
+        GreetingPersonSerializer(self.person_1).data
+        self.person_1.first_name = "john"
+        self.person_1.save()
+
+        GreetingPersonSerializer(self.person_1, context={"language": "en"}).invalidate_cache()
+        self.assertEqual(GreetingPersonSerializer(self.person_1, context={"language": "en"}).data["first_name"], "john")
+        self.assertEqual(GreetingPersonSerializer(self.person_1).data["first_name"], "john")
+
+    def test_nested(self):
+        group = Group.objects.create(name="Group")
+        group.people.add(self.person_1)
+        data = GreetingGroupSerializer(group, context={"language": "en"}).data
+        self.assertEqual(data["people"][0]["greeting"], "Hello")
+        data = GreetingGroupSerializer(group, context={"language": "fr"}).data
+        self.assertEqual(data["people"][0]["greeting"], "Bonjour")
+        self.assertEqual(GreetingGroupSerializer(group).data["people"][0]["greeting"], "Hi")
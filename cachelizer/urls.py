@@ -0,0 +1,13 @@
+from django.urls import path
+
+from cachelizer import views
+
+urlpatterns = [
+    path('people/', views.PersonList.as_view(), name='person-list'),
+    path('people/<int:pk>/', views.PersonDetail.as_view(), name='person-detail'),
+    path('groups/', views.GroupList.as_view(), name='group-list'),
+    path('groups/export/', views.GroupExport.as_view(), name='group-export'),
+    path('groups/<int:pk>/', views.GroupDetail.as_view(), name='group-detail'),
+    path('dogs/', views.DogList.as_view(), name='dog-list'),
+    path('dogs/<int:pk>/', views.DogDetail.as_view(), name='dog-detail'),
+]
@@ -1,3 +1,65 @@
-from django.shortcuts import render
+from rest_framework import generics
 
-# Create your views here.
+from cachelizer.models import Person, Group, Dog
+from cachelizer.pagination import CachedPageNumberPagination
+from cachelizer.serializers import PersonSerializer, GroupSerializer, DogSerializer
+from cachelizer.streaming import StreamingListMixin
+
+
+class DemoPagination(CachedPageNumberPagination):
+    page_size = 50
+
+
+class CachedSerializerViewMixin:
+    pagination_class = DemoPagination
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("two_phase", True)
+        return super().get_serializer(*args, **kwargs)
+
+
+class PersonList(CachedSerializerViewMixin, generics.ListAPIView):
+    queryset = Person.objects.select_related("pet").order_by("pk")
+    serializer_class = PersonSerializer
+
+
+class PersonDetail(CachedSerializerViewMixin, generics.RetrieveAPIView):
+    queryset = Person.objects.select_related("pet")
+    serializer_class = PersonSerializer
+
+
+class PersonUpdate(PersonDetail, generics.RetrieveUpdateAPIView):
+    """
+    unauthenticated writes for the load testing harness, only routed by `cachelizer.loadtest_urls`
+    """
+
+    def perform_update(self, serializer):
+        person = serializer.save()
+        serializer.invalidate_cache()
+        # the groups embed the person
+        GroupSerializer(person.groups.all(), many=True).invalidate_cache()
+
+
+class GroupList(CachedSerializerViewMixin, generics.ListAPIView):
+    queryset = Group.objects.prefetch_related("people__pet").order_by("pk")
+    serializer_class = GroupSerializer
+
+
+class GroupDetail(CachedSerializerViewMixin, generics.RetrieveAPIView):
+    queryset = Group.objects.prefetch_related("people__pet")
+    serializer_class = GroupSerializer
+
+
+class GroupExport(StreamingListMixin, CachedSerializerViewMixin, generics.ListAPIView):
+    queryset = Group.objects.prefetch_related("people__pet").order_by("pk")
+    serializer_class = GroupSerializer
+
+
+class DogList(CachedSerializerViewMixin, generics.ListAPIView):
+    queryset = Dog.objects.order_by("pk")
+    serializer_class = DogSerializer
+
+
+class DogDetail(CachedSerializerViewMixin, generics.RetrieveAPIView):
+    queryset = Dog.objects.all()
+    serializer_class = DogSerializer